@@ -2,13 +2,17 @@
 Celery应用程序配置
 """
 import os
+import orjson
 from celery import Celery
 from dotenv import load_dotenv
+from kombu.serialization import register
 
-# 加载环境变量
-load_dotenv()
+# 加载环境变量（已通过环境提供Broker配置时跳过.env文件查找）
+if not os.getenv('CELERY_BROKER_URL'):
+    load_dotenv()
 
-# 创建Celery实例
+# 创建Celery实例（include中的任务模块只在worker启动时导入，
+# 发送任务的一端通过任务名称调用send_task，无需导入app.tasks）
 celery_app = Celery(
     'sas_code_analysis',
     broker=os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
@@ -16,11 +20,20 @@ celery_app = Celery(
     include=['app.tasks']
 )
 
-# 配置Celery
+# 注册orjson序列化器（比标准库json更快，适合较大的SAS代码任务参数）
+register(
+    'orjson',
+    orjson.dumps,
+    orjson.loads,
+    content_type='application/x-orjson',
+    content_encoding='utf-8'
+)
+
+# 配置Celery（仍接受json，兼容已在队列中的旧消息）
 celery_app.conf.update(
-    task_serializer='json',
-    accept_content=['json'],
-    result_serializer='json',
+    task_serializer='orjson',
+    accept_content=['orjson', 'json'],
+    result_serializer='orjson',
     timezone='UTC',
     enable_utc=True,
 )
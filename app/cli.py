@@ -4,14 +4,35 @@ SAS代码分析命令行接口
 import os
 import sys
 import argparse
-import json
-from typing import Dict, Any
+import functools
+import orjson
+from typing import Dict, Any, List
 
-from app.tasks import analyze_code, analyze_file, analyze_directory
 
+# 各子命令共用的选项: 选项 -> (属性名, 类型)
+COMMON_OPTIONS = {
+    '--token-size': ('token_size', int),
+    '--output': ('output', str),
+    '-o': ('output', str),
+}
 
-def parse_args():
-    """解析命令行参数"""
+# 子命令 -> (位置参数属性名, 是否接受多个位置参数, 专有选项, 专有选项默认值)
+COMMANDS = {
+    'code': ('code', False, {}, {}),
+    'file': ('file_paths', True, {'--batch': ('batch', str)}, {'batch': None}),
+    'dir': ('dir_path', False, {'--pattern': ('pattern', str)}, {'pattern': '*.sas'}),
+}
+
+
+# Celery任务名称，按名称发送任务，命令行端无需导入app.tasks及其分析器依赖
+ANALYZE_CODE_TASK = 'sas_code_analysis.analyze_code'
+ANALYZE_FILE_TASK = 'sas_code_analysis.analyze_file'
+ANALYZE_DIRECTORY_TASK = 'sas_code_analysis.analyze_directory'
+
+
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    """构建完整的命令行参数解析器（用于--help及非常规参数，同一进程内只构建一次）"""
     parser = argparse.ArgumentParser(description='SAS代码分析工具')
     
     # 创建子命令
@@ -25,7 +46,8 @@ def parse_args():
     
     # 分析文件命令
     file_parser = subparsers.add_parser('file', help='分析SAS代码文件')
-    file_parser.add_argument('file_path', help='SAS代码文件路径')
+    file_parser.add_argument('file_paths', nargs='*', help='SAS代码文件路径（可指定多个）')
+    file_parser.add_argument('--batch', help='包含SAS文件路径的列表文件（每行一个路径）')
     file_parser.add_argument('--token-size', type=int, default=4000, help='最大令牌大小')
     file_parser.add_argument('--output', '-o', help='输出文件路径')
     
@@ -36,17 +58,110 @@ def parse_args():
     dir_parser.add_argument('--token-size', type=int, default=4000, help='最大令牌大小')
     dir_parser.add_argument('--output', '-o', help='输出文件路径')
     
-    return parser.parse_args()
+    return parser
+
+
+def fast_parse_args(argv: List[str]):
+    """
+    快速解析常见形式的命令行参数，无需构建argparse解析器
+    
+    Args:
+        argv: 命令行参数列表（不含程序名）
+        
+    Returns:
+        解析结果，遇到无法识别的参数（包括--help）时返回None
+    """
+    if not argv or argv[0] not in COMMANDS:
+        return None
+    
+    command = argv[0]
+    dest, multiple, extra_options, extra_defaults = COMMANDS[command]
+    
+    values = {'command': command, 'token_size': 4000, 'output': None}
+    values.update(extra_defaults)
+    positionals = []
+    
+    i = 1
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('-'):
+            option = extra_options.get(arg) or COMMON_OPTIONS.get(arg)
+            if option is None or i + 1 >= len(argv) or argv[i + 1].startswith('-'):
+                return None
+            name, convert = option
+            try:
+                values[name] = convert(argv[i + 1])
+            except ValueError:
+                return None
+            i += 2
+        else:
+            positionals.append(arg)
+            i += 1
+    
+    if multiple:
+        values[dest] = positionals
+    elif len(positionals) == 1:
+        values[dest] = positionals[0]
+    else:
+        return None
+    
+    return argparse.Namespace(**values)
+
+
+def parse_args():
+    """解析命令行参数"""
+    args = fast_parse_args(sys.argv[1:])
+    if args is not None:
+        return args
+    
+    # 帮助信息及错误提示由argparse负责
+    return build_parser().parse_args()
 
 
 def save_result(result: Dict[str, Any], output_path: str = None):
-    """保存分析结果"""
+    """保存分析结果（orjson直接生成UTF-8字节，一次写入）"""
+    data = orjson.dumps(result, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
     if output_path:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(result, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            f.write(data)
         print(f"结果已保存到: {output_path}")
     else:
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        sys.stdout.flush()
+        sys.stdout.buffer.write(data + b'\n')
+        sys.stdout.flush()
+
+
+def read_batch_file(batch_path: str) -> List[str]:
+    """读取批量文件列表，忽略空行"""
+    with open(batch_path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def submit_files(file_paths: List[str], token_size: int):
+    """
+    批量提交文件分析任务
+    
+    所有任务签名通过一个group一次性发送，避免在循环中逐个调用.delay()；
+    发送期间从连接池取出一个producer，所有任务复用同一个Broker连接
+    
+    Args:
+        file_paths: SAS代码文件路径列表
+        token_size: 最大令牌大小
+    """
+    from celery import group
+    from app.celery_app import celery_app
+    
+    signatures = [
+        celery_app.signature(ANALYZE_FILE_TASK, args=(file_path, token_size))
+        for file_path in file_paths
+    ]
+    with celery_app.producer_pool.acquire(block=True) as producer:
+        group_result = group(signatures).apply_async(producer=producer)
+    
+    print(f"任务组ID: {group_result.id}")
+    for file_path, result in zip(file_paths, group_result.results):
+        print(f"任务ID: {result.id}  文件: {file_path}")
+    print(f"已提交 {len(file_paths)} 个任务，请稍后查看结果")
 
 
 def main():
@@ -55,27 +170,48 @@ def main():
     
     if args.command == 'code':
         # 分析代码
-        result = analyze_code.delay(args.code, args.token_size)
+        from app.celery_app import celery_app
+        
+        result = celery_app.send_task(ANALYZE_CODE_TASK, args=(args.code, args.token_size))
         print(f"任务ID: {result.id}")
         print("任务已提交，请稍后查看结果")
         
     elif args.command == 'file':
         # 分析文件
-        if not os.path.exists(args.file_path):
-            print(f"错误: 文件不存在: {args.file_path}")
+        file_paths = list(args.file_paths)
+        if args.batch:
+            if not os.path.exists(args.batch):
+                print(f"错误: 文件不存在: {args.batch}")
+                sys.exit(1)
+            file_paths.extend(read_batch_file(args.batch))
+        
+        if not file_paths:
+            print("错误: 请指定SAS代码文件路径或--batch列表文件")
             sys.exit(1)
+        
+        for file_path in file_paths:
+            if not os.path.exists(file_path):
+                print(f"错误: 文件不存在: {file_path}")
+                sys.exit(1)
+        
+        if len(file_paths) == 1:
+            from app.celery_app import celery_app
             
-        result = analyze_file.delay(args.file_path, args.token_size)
-        print(f"任务ID: {result.id}")
-        print("任务已提交，请稍后查看结果")
+            result = celery_app.send_task(ANALYZE_FILE_TASK, args=(file_paths[0], args.token_size))
+            print(f"任务ID: {result.id}")
+            print("任务已提交，请稍后查看结果")
+        else:
+            submit_files(file_paths, args.token_size)
         
     elif args.command == 'dir':
         # 分析目录
         if not os.path.isdir(args.dir_path):
             print(f"错误: 目录不存在: {args.dir_path}")
             sys.exit(1)
-            
-        result = analyze_directory.delay(args.dir_path, args.pattern, args.token_size)
+        
+        from app.celery_app import celery_app
+        
+        result = celery_app.send_task(ANALYZE_DIRECTORY_TASK, args=(args.dir_path, args.pattern, args.token_size))
         print(f"任务ID: {result.id}")
         print("任务已提交，请稍后查看结果")
         
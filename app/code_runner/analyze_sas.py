@@ -7,17 +7,29 @@ Command line tool for analyzing database usage in SAS code
 import argparse
 import sys
 import os
-import json
 from pathlib import Path
 
+import orjson
+
 # Add parent directory to sys.path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
-from app.code_runner.data_source_analyzer import analyze_data_sources, analyze_databases
+from app.code_runner.data_source_analyzer import analyze_data_sources_obj, analyze_databases_obj
 
 
-def main():
-    """Main function"""
+# Option -> (attribute name, whether the option takes a value)
+OPTIONS = {
+    '--output': ('output', True),
+    '-o': ('output', True),
+    '--database-only': ('database_only', False),
+    '-d': ('database_only', False),
+    '--pretty': ('pretty', False),
+    '-p': ('pretty', False),
+}
+
+
+def build_parser():
+    """Build the full argument parser (used for --help and unusual arguments)"""
     parser = argparse.ArgumentParser(description='Analyze database usage in SAS code')
     
     # Add arguments
@@ -26,46 +38,89 @@ def main():
     parser.add_argument('--database-only', '-d', action='store_true', help='Only analyze database usage')
     parser.add_argument('--pretty', '-p', action='store_true', help='Pretty print JSON output')
     
-    # Parse arguments
-    args = parser.parse_args()
+    return parser
+
+
+def fast_parse_args(argv):
+    """
+    Parse the common argument shapes without building an ArgumentParser
+    
+    Args:
+        argv: Command line arguments (without program name)
+        
+    Returns:
+        Parsed arguments, or None if an argument is not recognized (including --help)
+    """
+    values = {'file': None, 'output': None, 'database_only': False, 'pretty': False}
+    
+    i = 0
+    while i < len(argv):
+        arg = argv[i]
+        if arg.startswith('-'):
+            option = OPTIONS.get(arg)
+            if option is None:
+                return None
+            name, takes_value = option
+            if takes_value:
+                if i + 1 >= len(argv) or argv[i + 1].startswith('-'):
+                    return None
+                values[name] = argv[i + 1]
+                i += 2
+            else:
+                values[name] = True
+                i += 1
+        elif values['file'] is None:
+            values['file'] = arg
+            i += 1
+        else:
+            return None
+    
+    return argparse.Namespace(**values)
+
+
+def main():
+    """Main function"""
+    # Parse arguments, falling back to argparse for help and error messages
+    args = fast_parse_args(sys.argv[1:])
+    if args is None:
+        args = build_parser().parse_args()
     
     # Read SAS code
     if args.file:
         try:
-            with open(args.file, 'r', encoding='utf-8') as f:
-                code = f.read()
+            with open(args.file, 'rb') as f:
+                code = f.read().decode('utf-8')
         except Exception as e:
             print(f"Error: Cannot read file {args.file}, {str(e)}", file=sys.stderr)
             return 1
     else:
         # Read from stdin
         print("Please enter SAS code, press Ctrl+D (Unix) or Ctrl+Z (Windows) when done:")
-        code = sys.stdin.read()
+        code = sys.stdin.buffer.read().decode('utf-8')
     
     # Analyze code
     try:
         if args.database_only:
-            result = analyze_databases(code)
+            result = analyze_databases_obj(code)
         else:
-            result = analyze_data_sources(code)
+            result = analyze_data_sources_obj(code)
         
-        # Pretty print JSON if requested
-        if args.pretty and not args.output:
-            # Convert to object and format output
-            result_obj = json.loads(result)
-            result = json.dumps(result_obj, indent=2, ensure_ascii=False)
+        # Serialize the analysis result once with orjson, which produces UTF-8 bytes directly
+        output = orjson.dumps(result, option=orjson.OPT_INDENT_2)
         
         # Output results
         if args.output:
             try:
-                with open(args.output, 'w', encoding='utf-8') as f:
-                    f.write(result)
+                with open(args.output, 'wb') as f:
+                    f.write(output)
                 print(f"Analysis results saved to: {args.output}")
             except Exception as e:
                 print(f"Error: Cannot write to file {args.output}, {str(e)}", file=sys.stderr)
                 return 1
         else:
-            print(result)
+            sys.stdout.flush()
+            sys.stdout.buffer.write(output + b'\n')
+            sys.stdout.flush()
         
         return 0
     
@@ -4,16 +4,23 @@ API Interface Module
 Provides HTTP API interface to run Python scripts and get real-time logs
 """
 import os
-import json
 import time
+import hashlib
+import importlib.util
 import logging
 import asyncio
-from typing import Dict, List, Any, Optional
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import Dict, List, Any, Optional, Set, Tuple, AsyncIterator
+import anyio
+import orjson
 from fastapi import FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
+from starlette.types import Receive, Scope, Send
 import uvicorn
 from .script_runner import ScriptRunner
 from .test_examples import get_examples
@@ -25,9 +32,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum number of worker threads for blocking script runner calls (anyio default is 40)
+THREAD_LIMIT = 200
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Configure the worker thread pool and run the status cache sweeper while the service runs"""
+    anyio.to_thread.current_default_thread_limiter().total_tokens = THREAD_LIMIT
+    sweeper = asyncio.create_task(sweep_status_cache())
+    yield
+    sweeper.cancel()
+
+
 # Create FastAPI application
 app = FastAPI(title="Python Code Runner API", 
-              description="API for running Python scripts with real-time logging")
+              description="API for running Python scripts with real-time logging",
+              lifespan=lifespan)
 
 # Add CORS middleware
 app.add_middleware(
@@ -41,10 +62,410 @@ app.add_middleware(
 # Create script runner
 script_runner = ScriptRunner()
 
-# Dictionary to store logs
-script_logs = {}
+# Maximum number of log lines kept per script
+MAX_LOG_LINES = 10000
+
+# Seconds to keep the logs of a finished script
+FINISHED_LOG_TTL = 300
+
+# Maximum number of scripts whose logs are kept, the oldest finished ones are evicted beyond it
+MAX_SCRIPT_LOGS = 1024
+
+
+class LogBuffer:
+    """
+    Log state of one script: a ring buffer of its most recent log lines, an event set
+    whenever it changes and the script's final status.
+    
+    Only touched on the event loop thread (reader threads hand lines over with
+    call_soon_threadsafe), so readers need no lock.
+    """
+    
+    def __init__(self, maxlen: int = MAX_LOG_LINES):
+        """
+        Initialize log buffer
+        
+        Args:
+            maxlen: Maximum number of lines kept
+        """
+        self.buf = deque(maxlen=maxlen)
+        self.head = 0  # Index of the oldest kept line, i.e. number of lines dropped so far
+        self.changed = asyncio.Event()  # Set when a line is added or the script ends
+        self.final_status: Optional[Dict[str, Any]] = None  # Set once all output has been read
+        self.last_line: Optional[str] = None  # Last line appended
+        self.repeats = 0  # Number of times the last line was repeated and not stored
+    
+    def append(self, message: str):
+        """
+        Append a log line, collapsing runs of the same line (progress bars, polling loops)
+        into the line and a repeat count. The count is stored when a different line arrives
+        or a reader flushes it, so a run of repeats still wakes the streaming clients
+        
+        Args:
+            message: Log line
+        """
+        if message == self.last_line:
+            self.repeats += 1
+            self.changed.set()
+            return
+        
+        self.flush_repeats()
+        self.last_line = message
+        self._push(message)
+    
+    def flush_repeats(self):
+        """Store the repeat count of the last line, if it was repeated"""
+        if self.repeats == 1:
+            self._push(self.last_line)
+        elif self.repeats:
+            self._push(f"(last line repeated {self.repeats} times)")
+            # Further repeats follow the count line, so the line itself is stored again first
+            self.last_line = None
+        self.repeats = 0
+    
+    def _push(self, message: str):
+        """
+        Store a log line, dropping the oldest one when the buffer is full
+        
+        Args:
+            message: Log line
+        """
+        if len(self.buf) == self.buf.maxlen:
+            self.head += 1
+        self.buf.append(message)
+        self.changed.set()
+    
+    @property
+    def end(self) -> int:
+        """Index after the newest line"""
+        return self.head + len(self.buf)
+    
+    def since(self, index: int = 0, limit: Optional[int] = None) -> List[str]:
+        """
+        Get the kept log lines starting at an absolute line index
+        
+        Args:
+            index: Index of the first line to return
+            limit: Maximum number of lines to return
+            
+        Returns:
+            List of logs
+        """
+        start = max(index - self.head, 0)
+        if start == 0 and limit is None:
+            return list(self.buf)
+        return list(islice(self.buf, start, None if limit is None else start + limit))
+
+
+class ScriptLogs(OrderedDict):
+    """
+    Log buffers by code ID, in the order they were created. A buffer is created on first
+    access, evicting the oldest finished script's logs when more than MAX_SCRIPT_LOGS are kept.
+    """
+    
+    def __missing__(self, code_id: str) -> LogBuffer:
+        log_buffer = self[code_id] = LogBuffer()
+        if len(self) > MAX_SCRIPT_LOGS:
+            # Logs of running scripts are never evicted, they are still being streamed
+            oldest = next((key for key, value in self.items() if value.final_status is not None), None)
+            if oldest is not None:
+                del self[oldest]
+        return log_buffer
+    
+    def touch(self, code_id: str) -> LogBuffer:
+        """
+        Create the log buffer of a script if it does not exist yet
+        
+        Args:
+            code_id: Code ID
+            
+        Returns:
+            Log buffer of the script
+        """
+        return self[code_id]
+
+
+# Dictionary to store logs, each script keeps only its most recent lines
+script_logs: ScriptLogs = ScriptLogs()
+
+# Script status cache {code_id: (time fetched, status)}, shared by all clients
+STATUS_CACHE_TTL = 0.2
+_status_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+
+
+async def get_cached_status(code_id: str) -> Dict[str, Any]:
+    """
+    Get script status, reusing a result fetched less than STATUS_CACHE_TTL seconds ago
+    
+    Args:
+        code_id: Code ID
+        
+    Returns:
+        Script status dictionary
+    """
+    cached = _status_cache.get(code_id)
+    now = time.monotonic()
+    if cached and now - cached[0] < STATUS_CACHE_TTL:
+        return cached[1]
+    
+    status = await anyio.to_thread.run_sync(script_runner.get_script_status, code_id)
+    _status_cache[code_id] = (now, status)
+    return status
+
+
+async def sweep_status_cache(interval: float = 60.0):
+    """
+    Periodically drop expired status cache entries, which would otherwise pile up for
+    code IDs that are looked up but never finish (unknown or mistyped IDs)
+    
+    Args:
+        interval: Seconds between sweeps
+    """
+    while True:
+        await asyncio.sleep(interval)
+        expired = time.monotonic() - STATUS_CACHE_TTL
+        for code_id in [key for key, (fetched, _) in _status_cache.items() if fetched < expired]:
+            del _status_cache[code_id]
+
+# Maximum number of log lines sent in one SSE event
+SSE_BATCH_SIZE = 500
+
+# Seconds to wait for more lines before sending a batch that is not full
+SSE_BATCH_LINGER = 0.01
+
+# Seconds without output after which a keep-alive comment is sent to streaming clients
+SSE_KEEPALIVE_INTERVAL = 15.0
+SSE_KEEPALIVE = b": keepalive\n\n"
+
+
+def publish_log(code_id: str, message: str):
+    """
+    Store a log line, waking every client streaming the script.
+    Must be called on the event loop thread.
+    
+    Args:
+        code_id: Code ID
+        message: Log line
+    """
+    script_logs[code_id].append(message)
+
+
+def publish_logs(code_id: str, messages: List[str]):
+    """
+    Store the log lines of one read of the script output, waking every client streaming the script.
+    Must be called on the event loop thread.
+    
+    Args:
+        code_id: Code ID
+        messages: Log lines
+    """
+    log_buffer = script_logs[code_id]
+    for message in messages:
+        log_buffer.append(message)
+
+
+def finish_logs(code_id: str, status: Dict[str, Any]):
+    """
+    Record the final status of a script, ending all of its log streams.
+    Must be called on the event loop thread.
+    
+    Args:
+        code_id: Code ID
+        status: Script status when its output ended
+    """
+    log_buffer = script_logs[code_id]
+    log_buffer.flush_repeats()
+    log_buffer.final_status = status
+    log_buffer.changed.set()
+    _status_cache.pop(code_id, None)
+    
+    # Evict the logs once clients have had time to read them
+    asyncio.get_running_loop().call_later(FINISHED_LOG_TTL, evict_logs, code_id)
+
+
+def evict_logs(code_id: str):
+    """
+    Forget the logs and final status of a finished script
+    
+    Args:
+        code_id: Code ID
+    """
+    script_logs.pop(code_id, None)
+    _status_cache.pop(code_id, None)
+
+
+async def _iter_batches(log_buffer: LogBuffer, running: bool):
+    """
+    Yield batches of log lines from a log buffer, waiting for new lines until the script ends.
+    Each client keeps its own position in the buffer; a client that falls behind by more than
+    the buffer size skips the lines that were dropped. Once woken, lines arriving within
+    SSE_BATCH_LINGER seconds are coalesced, up to SSE_BATCH_SIZE per batch. An empty batch is
+    yielded when no line arrives within SSE_KEEPALIVE_INTERVAL seconds.
+    
+    Args:
+        log_buffer: Log buffer of the script
+        running: Whether the script is running, otherwise only the stored lines are sent
+        
+    Yields:
+        Tuple of the log lines and whether the script has ended
+    """
+    index = log_buffer.head
+    while True:
+        # Repeats of the last line are only counted until a reader asks for them
+        log_buffer.flush_repeats()
+        batch = []
+        if index < log_buffer.head:
+            batch.append(f"... {log_buffer.head - index} log lines skipped, client too slow ...")
+            index = log_buffer.head
+        
+        ended = log_buffer.final_status is not None or not running
+        if index == log_buffer.end and not batch and not ended:
+            # Wait until the buffer changes
+            log_buffer.changed.clear()
+            try:
+                await asyncio.wait_for(log_buffer.changed.wait(), timeout=SSE_KEEPALIVE_INTERVAL)
+            except asyncio.TimeoutError:
+                yield [], False
+                continue
+            
+            # Output is bursty, so briefly wait for the rest of the burst
+            if log_buffer.final_status is None and log_buffer.end - index < SSE_BATCH_SIZE:
+                await asyncio.sleep(SSE_BATCH_LINGER)
+            continue
+        
+        lines = log_buffer.since(index, SSE_BATCH_SIZE)
+        index += len(lines)
+        batch.extend(lines)
+        
+        finished = ended and index == log_buffer.end
+        yield batch, finished
+        if finished:
+            break
+
 
-# Define request and response models
+class SSEResponse(Response):
+    """
+    Server-sent events response.
+    
+    Writes the pre-framed bytes chunks of an async iterator straight to the ASGI send channel,
+    and stops the iterator when the client disconnects.
+    """
+    media_type = "text/event-stream"
+    
+    def __init__(self, content: AsyncIterator[bytes]):
+        """
+        Initialize SSE response
+        
+        Args:
+            content: Async iterator of SSE event bytes
+        """
+        self.body_iterator = content
+        self.status_code = 200
+        self.background = None
+        # Events must reach the client as they are sent: no buffering by nginx and no
+        # transformation by proxies. No compression middleware is installed on this app; one
+        # added later must exclude text/event-stream rather than buffer the stream
+        self.init_headers({
+            'Cache-Control': 'no-cache, no-transform',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive'
+        })
+    
+    async def _stream(self, send: Send):
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        async for chunk in self.body_iterator:
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+    
+    async def _wait_for_disconnect(self, receive: Receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        async with anyio.create_task_group() as task_group:
+            async def run_and_cancel(func, channel):
+                await func(channel)
+                task_group.cancel_scope.cancel()
+            
+            task_group.start_soon(run_and_cancel, self._stream, send)
+            await run_and_cancel(self._wait_for_disconnect, receive)
+
+
+def _sse_event(data: Dict[str, Any]) -> bytes:
+    """
+    Format an SSE event
+    
+    Args:
+        data: Event data
+        
+    Returns:
+        SSE event bytes
+    """
+    return b"data: " + orjson.dumps(data) + b"\n\n"
+
+
+# Final SSE events of streams without pending log lines, for the most common return codes
+_FINISH_FRAMES = {
+    return_code: _sse_event({'logs': [f'Script has ended, return code: {return_code}'], 'finished': True})
+    for return_code in (0, 1, 2, -9, -15, 130)
+}
+
+
+def _finish_event(logs: List[str], return_code: int) -> bytes:
+    """
+    Build the final SSE event of a log stream
+    
+    Args:
+        logs: Log lines not yet sent
+        return_code: Return code of the script
+        
+    Returns:
+        SSE event bytes
+    """
+    if not logs and return_code in _FINISH_FRAMES:
+        return _FINISH_FRAMES[return_code]
+    return _sse_event({'logs': logs + [f'Script has ended, return code: {return_code}'], 'finished': True})
+
+
+# Scripts being set up and started, referenced until done so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+
+async def _start_script(code_id: str, code: str, skip_dependencies: bool):
+    """
+    Set up and start a script on a worker thread, publishing its setup messages and output
+    
+    Args:
+        code_id: Code ID
+        code: Python code
+        skip_dependencies: Whether to skip dependency installation
+    """
+    loop = asyncio.get_running_loop()
+    
+    # Both callbacks are called from worker threads, call_soon_threadsafe keeps the lines in order
+    def log_callback(message):
+        loop.call_soon_threadsafe(publish_log, code_id, message)
+    
+    # Output arrives as the lines of each read, handed to the event loop together
+    def output_callback(script_id, lines, status=None):
+        if lines is None:
+            # The final status comes with the end of output, the runner may have forgotten the script
+            loop.call_soon_threadsafe(finish_logs, script_id, status)
+        else:
+            loop.call_soon_threadsafe(publish_logs, script_id, lines)
+    
+    try:
+        await anyio.to_thread.run_sync(
+            script_runner.run_script, code, log_callback, skip_dependencies, output_callback, code_id
+        )
+    except Exception as e:
+        logger.error(f"Error running script {code_id}: {str(e)}")
+        publish_log(code_id, f"Error running script: {str(e)}")
+        # Polling the process blocks, keep it off the event loop
+        finish_logs(code_id, await anyio.to_thread.run_sync(script_runner.get_script_status, code_id))
+
+# Define request and response models, responses are documented with them but returned
+# as ORJSONResponse without being validated again
 class CodeRequest(BaseModel):
     code: str
     skip_dependencies: bool = False
@@ -60,17 +481,55 @@ class ErrorResponse(BaseModel):
     error: str
 
 # Mount static files directory
-static_dir = os.path.join(os.path.dirname(__file__), "static")
-os.makedirs(static_dir, exist_ok=True)
+STATIC_DIR = os.path.join(os.path.dirname(__file__), "static")
+os.makedirs(STATIC_DIR, exist_ok=True)
+INDEX_PATH = os.path.join(STATIC_DIR, "index.html")
+
+# Read index.html once, it is served from memory
+try:
+    with open(INDEX_PATH, 'rb') as f:
+        INDEX_HTML = f.read()
+except FileNotFoundError:
+    INDEX_HTML = None
 
-# Root endpoint redirects to index.html
+# Root endpoint serves index.html
 @app.get("/")
 async def root():
-    return FileResponse(os.path.join(static_dir, "index.html"))
+    if INDEX_HTML is None:
+        raise HTTPException(status_code=404, detail="index.html not found")
+    return Response(content=INDEX_HTML, media_type="text/html")
+
+# Examples never change while the service runs, so serialize them once,
+# together with an ETag so that clients can revalidate them without downloading them again
+EXAMPLES = get_examples()
+EXAMPLES_JSON = orjson.dumps(EXAMPLES)
+EXAMPLE_JSON = {example_id: orjson.dumps(example) for example_id, example in EXAMPLES.items()}
+ETAGS = {
+    content: f'"{hashlib.md5(content).hexdigest()}"'
+    for content in [EXAMPLES_JSON, *EXAMPLE_JSON.values()]
+}
+
+
+def _json_bytes_response(request: Request, content: bytes) -> Response:
+    """
+    Return pre-serialized JSON with its ETag, answering 304 when the client already has it
+    
+    Args:
+        request: Request
+        content: JSON bytes, a key of ETAGS
+        
+    Returns:
+        Response
+    """
+    etag = ETAGS[content]
+    headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=content, media_type="application/json", headers=headers)
 
 # Get examples endpoint
 @app.get("/api/examples")
-async def get_all_examples():
+async def get_all_examples(request: Request):
     """
     Get all example codes
     
@@ -88,11 +547,11 @@ async def get_all_examples():
         }
     }
     """
-    return get_examples()
+    return _json_bytes_response(request, EXAMPLES_JSON)
 
 # Get specific example endpoint
 @app.get("/api/example/{example_id}")
-async def get_example(example_id: str):
+async def get_example(example_id: str, request: Request):
     """
     Get specific example code
     
@@ -103,14 +562,20 @@ async def get_example(example_id: str):
         "code": "..."
     }
     """
-    examples = get_examples()
-    if example_id not in examples:
+    if example_id not in EXAMPLE_JSON:
         raise HTTPException(status_code=404, detail=f"Example {example_id} not found")
     
-    return examples[example_id]
+    return _json_bytes_response(request, EXAMPLE_JSON[example_id])
 
-@app.post("/api/run", response_model=ScriptResponse)
-async def run_script(code_request: CodeRequest):
+@app.post(
+    "/api/run",
+    responses={200: {"model": ScriptResponse}},
+    openapi_extra={"requestBody": {
+        "content": {"application/json": {"schema": CodeRequest.model_json_schema()}},
+        "required": True,
+    }},
+)
+async def run_script(request: Request):
     """
     Run Python Script API
     
@@ -126,60 +591,55 @@ async def run_script(code_request: CodeRequest):
         "message": "Script has started running"
     }
     """
+    # Parse the body with pydantic's JSON parser directly, skipping the dict round-trip
     try:
-        code = code_request.code
-        skip_dependencies = code_request.skip_dependencies
-        
-        # Initialize log list
-        code_id = None
-        
-        def log_callback(message):
-            nonlocal code_id
-            if code_id:
-                if code_id not in script_logs:
-                    script_logs[code_id] = []
-                script_logs[code_id].append(message)
-        
-        # Run script
-        code_id = script_runner.run_script(code, log_callback, skip_dependencies)
-        
-        # Initialize logs
-        if code_id not in script_logs:
-            script_logs[code_id] = []
+        code_request = CodeRequest.model_validate_json(await request.body())
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_input=False))
+    
+    try:
+        # Set up and start the script in the background, so slow dependency installation
+        # never holds up this response. Its logs can be streamed right away
+        code_id = script_runner.generate_script_id()
+        # Create the log buffer now, so the script is known as starting until the runner has it
+        script_logs.touch(code_id)
+        task = asyncio.create_task(_start_script(code_id, code_request.code, code_request.skip_dependencies))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
         
-        return {
+        return ORJSONResponse({
             'code_id': code_id,
             'message': 'Script has started running'
-        }
+        })
         
     except Exception as e:
         logger.error(f"Error in run script API: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error running script: {str(e)}")
 
 
-@app.get("/api/logs/{code_id}", response_model=LogsResponse)
-async def get_logs(code_id: str):
+@app.get("/api/logs/{code_id}", responses={200: {"model": LogsResponse}})
+async def get_logs(code_id: str, since: int = 0):
     """
     Get Script Logs API
     
+    Reads the log store filled by the script runner; the script's output is never consumed here,
+    so this endpoint and /api/stream-logs can be used together.
+    
+    Query parameters:
+        since: Index of the first log line to return, lets pollers fetch only new lines
+    
     Response:
     {
         "logs": ["Log 1", "Log 2", ...]
     }
     """
     try:
-        # Get new logs
-        new_logs = script_runner.get_logs(code_id)
-        
-        # Add to log storage
-        if code_id not in script_logs:
-            script_logs[code_id] = []
-        
-        script_logs[code_id].extend(new_logs)
-        
-        return {
-            'logs': script_logs[code_id]
-        }
+        log_buffer = script_logs.get(code_id)
+        if log_buffer:
+            log_buffer.flush_repeats()
+        return ORJSONResponse({
+            'logs': log_buffer.since(since) if log_buffer else []
+        })
         
     except Exception as e:
         logger.error(f"Error in get logs API: {str(e)}")
@@ -191,62 +651,41 @@ async def stream_logs(code_id: str):
     """
     Stream Script Logs API
     
-    Response: Event stream
+    Response: Event stream, each event carries a batch of log lines
+    {
+        "logs": ["Log 1", "Log 2", ...],
+        "finished": true  (only on the last event)
+    }
     """
     async def generate():
-        # Initialize log index
-        if code_id not in script_logs:
-            script_logs[code_id] = []
-        
-        log_index = 0
+        status = await get_cached_status(code_id)
+        log_buffer = script_logs.get(code_id)
         
-        # Short initial wait time to improve responsiveness
-        wait_time = 0.1
+        # A script is not known to the runner until its setup has finished
+        running = status['status'] != 'not_found' or (log_buffer is not None and log_buffer.final_status is None)
+        if log_buffer is None and running:
+            log_buffer = script_logs[code_id]
         
-        while True:
-            try:
-                # Get new logs
-                new_logs = script_runner.get_logs(code_id)
-                
-                # Send immediately when there are new logs
-                has_new_logs = len(new_logs) > 0
-                
-                # Add to log storage
-                script_logs[code_id].extend(new_logs)
-                
-                # Send new logs
-                current_logs = script_logs[code_id]
-                while log_index < len(current_logs):
-                    log = current_logs[log_index]
-                    log_index += 1
-                    yield f"data: {json.dumps({'log': log})}\n\n"
-                
-                # Check if script has ended
-                status = script_runner.get_script_status(code_id)
-                if status['status'] == 'finished' or status['status'] == 'not_found':
-                    return_code = status.get('return_code', 0)
-                    yield f"data: {json.dumps({'log': f'Script has ended, return code: {return_code}', 'finished': True})}\n\n"
-                    break
-                
-                # Dynamically adjust wait time: quick response when there are logs, gradually increase wait time when there are no logs
-                if has_new_logs:
-                    # When there are new logs, keep the wait time short
-                    wait_time = 0.1
-                else:
-                    # No new logs, gradually increase wait time, but not exceeding 0.5 seconds
-                    wait_time = min(wait_time * 1.2, 0.5)
-                
-                # Wait for a while
-                await asyncio.sleep(wait_time)
-            except Exception as e:
-                logger.error(f"Error in stream logs: {str(e)}")
-                yield f"data: {json.dumps({'log': f'Error in stream logs: {str(e)}', 'finished': True})}\n\n"
-                break
-    
-    return StreamingResponse(
-        generate(),
-        media_type='text/event-stream'
-    )
+        try:
+            # Send the logs until the script ends, the last batch is sent together with the end message
+            last_logs = []
+            if log_buffer is not None:
+                async for logs, finished in _iter_batches(log_buffer, running):
+                    if finished:
+                        last_logs = logs
+                    elif logs:
+                        yield _sse_event({'logs': logs})
+                    else:
+                        # Keep idle connections open through proxies
+                        yield SSE_KEEPALIVE
+            
+            status = (log_buffer and log_buffer.final_status) or await get_cached_status(code_id)
+            yield _finish_event(last_logs, status.get('return_code', 0))
+        except Exception as e:
+            logger.error(f"Error in stream logs: {str(e)}")
+            yield _sse_event({'logs': [f'Error in stream logs: {str(e)}'], 'finished': True})
+    
+    return SSEResponse(generate())
 
 
 @app.get("/api/status/{code_id}")
@@ -257,23 +696,31 @@ async def get_status(code_id: str):
     Response:
     {
         "code_id": "Code ID",
-        "status": "running|finished|not_found",
+        "status": "starting|running|finished|not_found",
         ...
     }
     """
     try:
-        status = script_runner.get_script_status(code_id)
+        log_buffer = script_logs.get(code_id)
+        if log_buffer and log_buffer.final_status:
+            status = dict(log_buffer.final_status)
+        else:
+            status = dict(await get_cached_status(code_id))
+            if status['status'] == 'not_found' and log_buffer is not None:
+                # Dependencies are still being installed
+                status['status'] = 'starting'
+                status['message'] = f"Script {code_id} is being set up"
         # Replace script_id with code_id in the response
         if 'script_id' in status:
             status['code_id'] = status.pop('script_id')
-        return status
+        return ORJSONResponse(status)
         
     except Exception as e:
         logger.error(f"Error in get status API: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error getting status: {str(e)}")
 
 
-@app.post("/api/stop/{code_id}", response_model=ScriptResponse)
+@app.post("/api/stop/{code_id}", responses={200: {"model": ScriptResponse}})
 async def stop_script(code_id: str):
     """
     Stop Script API
@@ -285,13 +732,15 @@ async def stop_script(code_id: str):
     }
     """
     try:
-        success = script_runner.stop_script(code_id)
+        # Stopping waits for the process to exit, keep it off the event loop
+        success = await anyio.to_thread.run_sync(script_runner.stop_script, code_id)
+        _status_cache.pop(code_id, None)
         
         if success:
-            return {
+            return ORJSONResponse({
                 'code_id': code_id,
                 'message': 'Script has been stopped'
-            }
+            })
         else:
             raise HTTPException(
                 status_code=404, 
@@ -305,7 +754,7 @@ async def stop_script(code_id: str):
         raise HTTPException(status_code=500, detail=f"Error stopping script: {str(e)}")
 
 
-def start_api(host='0.0.0.0', port=5000, debug=False, static_dir=None):
+def start_api(host='0.0.0.0', port=5000, debug=False, static_dir=None, fd=None, backlog=2048):
     """
     Start API service
     
@@ -314,17 +763,29 @@ def start_api(host='0.0.0.0', port=5000, debug=False, static_dir=None):
         port: Port number
         debug: Whether to enable debug mode
         static_dir: Static files directory path
+        fd: File descriptor of an already listening socket (socket activation), overrides host and port
+        backlog: Maximum number of pending connections, absorbs bursts of requests
     """
-    # Mount static files if provided
-    if static_dir:
-        app.mount("/static", StaticFiles(directory=static_dir), name="static")
-    else:
-        # Use default static directory
-        default_static_dir = os.path.join(os.path.dirname(__file__), "static")
-        if os.path.exists(default_static_dir):
-            app.mount("/static", StaticFiles(directory=default_static_dir), name="static")
+    # Mount static files, using the default static directory if none is provided
+    app.mount("/static", StaticFiles(directory=static_dir or STATIC_DIR), name="static")
     
-    uvicorn.run(app, host=host, port=port, log_level="debug" if debug else "info")
+    # Prefer the C implementations of the event loop and HTTP parser (installed with uvicorn[standard])
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+    if loop != "uvloop" or http != "httptools":
+        logger.warning(f"uvloop/httptools not installed, using {loop} and {http}; install uvicorn[standard] for better performance")
+    
+    # Logs and running scripts are kept in this process, so the service runs a single worker
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        fd=fd,
+        backlog=backlog,
+        loop=loop,
+        http=http,
+        log_level="debug" if debug else "info"
+    )
 
 
 if __name__ == '__main__':
@@ -7,6 +7,7 @@ import os
 import sys
 import argparse
 import logging
+import threading
 from typing import Dict, List, Any
 from .script_runner import ScriptRunner
 from .api import start_api
@@ -37,6 +38,8 @@ def parse_args():
     api_parser.add_argument('--debug', action='store_true', help='Enable debug mode')
     api_parser.add_argument('--venv', help='Virtual environment path')
     api_parser.add_argument('--static', help='Static files directory path')
+    api_parser.add_argument('--fd', type=int, help='Listen on an inherited socket file descriptor (socket activation)')
+    api_parser.add_argument('--backlog', type=int, default=2048, help='Maximum number of pending connections')
     
     return parser.parse_args()
 
@@ -58,28 +61,29 @@ def run_script(file_path: str, venv_path: str = None):
     with open(file_path, 'r', encoding='utf-8') as f:
         code = f.read()
     
-    # Create script runner
-    script_runner = ScriptRunner(venv_path=venv_path)
+    # Create script runner, only one script is run so no interpreter is started in advance
+    script_runner = ScriptRunner(venv_path=venv_path, prestart=False)
     
     # Log callback function
     def log_callback(message):
         logger.info(message)
     
+    # Output callback function, called from the reader threads until the script has ended
+    finished = threading.Event()
+    
+    def output_callback(script_id, lines, status=None):
+        if lines is None:
+            finished.set()
+        else:
+            for line in lines:
+                logger.info(line)
+    
     # Run script
-    script_id = script_runner.run_script(code, log_callback)
+    script_id = script_runner.run_script(code, log_callback, output_callback=output_callback)
     
-    # Continuously get logs
-    while True:
-        logs = script_runner.get_logs(script_id)
-        
-        # Check if script has finished
-        status = script_runner.get_script_status(script_id)
-        if status['status'] == 'finished':
-            break
-        
-        # Wait for a while
-        import time
-        time.sleep(0.5)
+    # Wait until all output has been read, unless the script could not be started
+    if script_runner.get_script_status(script_id)['status'] != 'not_found':
+        finished.wait()
 
 
 def main():
@@ -90,7 +94,8 @@ def main():
         run_script(args.file, args.venv)
     elif args.command == 'api':
         logger.info(f"Starting FastAPI service, address: {args.host}:{args.port}")
-        start_api(host=args.host, port=args.port, debug=args.debug, static_dir=args.static)
+        start_api(host=args.host, port=args.port, debug=args.debug, static_dir=args.static,
+                  fd=args.fd, backlog=args.backlog)
     else:
         logger.error("No command specified, please use 'run' or 'api' command")
         sys.exit(1)
@@ -3,9 +3,9 @@ Data Source Analyzer Module
 
 Used to analyze data source usage in SAS code
 """
-import json
+import orjson
 from typing import Dict, List, Any
-from .database_analyzer import analyze_database_usage
+from .database_analyzer import analyze_database_usage_obj
 
 
 class DataSourceAnalyzer:
@@ -28,8 +28,7 @@ class DataSourceAnalyzer:
         Returns:
             List of database usage information
         """
-        db_json = analyze_database_usage(self.code)
-        return json.loads(db_json)
+        return analyze_database_usage_obj(self.code)
     
     def analyze_all(self) -> Dict[str, Any]:
         """
@@ -47,54 +46,88 @@ class DataSourceAnalyzer:
         
         return self.analysis_results
     
-    def get_analysis_json(self) -> str:
+    def get_analysis_json(self, pretty: bool = False) -> str:
         """
         Get JSON representation of analysis results
         
+        Args:
+            pretty: Whether to indent the JSON for reading, compact JSON otherwise
+            
         Returns:
             Analysis results in JSON format
         """
         if not self.analysis_results:
             self.analyze_all()
         
-        return json.dumps(self.analysis_results, indent=2)
+        return orjson.dumps(self.analysis_results, option=orjson.OPT_INDENT_2 if pretty else 0).decode()
     
-    def get_databases_json(self) -> str:
+    def get_databases_json(self, pretty: bool = False) -> str:
         """
         Get JSON representation of database analysis results
         
+        Args:
+            pretty: Whether to indent the JSON for reading, compact JSON otherwise
+            
         Returns:
             Database analysis results in JSON format
         """
         if "databases" not in self.analysis_results:
             self.analysis_results["databases"] = self.analyze_databases()
         
-        return json.dumps(self.analysis_results["databases"], indent=2)
+        return orjson.dumps(self.analysis_results["databases"], option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+
+
+def analyze_data_sources_obj(code: str) -> Dict[str, Any]:
+    """
+    Analyze data source usage in SAS code without serializing the result
+    
+    Args:
+        code: SAS code
+        
+    Returns:
+        Data source analysis results
+    """
+    return DataSourceAnalyzer(code).analyze_all()
+
+
+def analyze_databases_obj(code: str) -> List[Dict[str, Any]]:
+    """
+    Analyze database usage in SAS code without serializing the result
+    
+    Args:
+        code: SAS code
+        
+    Returns:
+        List of database usage information
+    """
+    return DataSourceAnalyzer(code).analyze_databases()
 
 
-def analyze_data_sources(code: str) -> str:
+def analyze_data_sources(code: str, pretty: bool = False) -> str:
     """
     Analyze data source usage in SAS code
     
     Args:
         code: SAS code
+        pretty: Whether to indent the JSON for reading, compact JSON otherwise
         
     Returns:
         Data source analysis results in JSON format
     """
     analyzer = DataSourceAnalyzer(code)
-    return analyzer.get_analysis_json()
+    return analyzer.get_analysis_json(pretty)
 
 
-def analyze_databases(code: str) -> str:
+def analyze_databases(code: str, pretty: bool = False) -> str:
     """
     Analyze database usage in SAS code
     
     Args:
         code: SAS code
+        pretty: Whether to indent the JSON for reading, compact JSON otherwise
         
     Returns:
         Database analysis results in JSON format
     """
     analyzer = DataSourceAnalyzer(code)
-    return analyzer.get_databases_json() 
\ No newline at end of file
+    return analyzer.get_databases_json(pretty)
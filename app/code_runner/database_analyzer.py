@@ -3,34 +3,336 @@ Database Analyzer Module
 
 Used to analyze database usage in SAS code
 """
+import os
 import re
-import json
-from typing import Dict, List, Any, Set
+import sys
+import bisect
+import logging
+import functools
+import orjson
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, FrozenSet, List, Any, Iterator, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Static patterns, compiled once. All patterns are matched against the lowercased code, so none
+# needs re.IGNORECASE; matched text is taken from the original code at the same positions
+# Variable and LIBNAME definitions share one scan. Both statements are optional lookaheads, so
+# both are tried at each position just as separate finditer passes would try them:
+#   groups 1-2: %let varname = value;
+#   groups 3-6: libname name type connection; with the whitespace before the connection in group 5
+# Each statement ends with the ';' right after its last group
+_DEFINITION_RE = re.compile(
+    r'(?=%let|libname)'
+    r'(?=%let\s+(\w+)\s*=\s*([^;]+);)?'
+    r'(?=libname\s+(\w+|\&\w+)\s+(\w+)(\s*)([^;]*);)?'
+)
+_SCHEMA_RE = re.compile(r'schema\s*=\s*["\']?([^"\'\s;]+)["\']?')
+_SQL_START_RE = re.compile(r'proc\s+sql;')
+
+# PROC SQL blocks of code at least this large are scanned in worker processes, when there are enough
+# of them to outweigh starting the workers
+PARALLEL_MIN_CODE_SIZE = 1024 * 1024
+PARALLEL_MIN_BLOCKS = 4
+
+
+def _load_pattern_engine():
+    """
+    Get the regex engine compiling the per-analysis table patterns
+    
+    The third-party regex module is opt-in through SAS_ANALYZER_REGEX_BACKEND, it handles the
+    long name alternations of these patterns better than re. With "regex" it is required and a
+    missing package is reported, with "auto" it is used whenever installed. re is used by default
+    
+    Returns:
+        The regex or re module
+    """
+    backend = os.getenv('SAS_ANALYZER_REGEX_BACKEND', 're').lower()
+    if backend in ('regex', 'auto'):
+        try:
+            import regex
+            return regex
+        except ImportError:
+            if backend == 'regex':
+                logger.warning("regex package not installed, falling back to the re module")
+    return re
+
+
+_pattern_engine = _load_pattern_engine()
+
+
+def _lower(code: str) -> str:
+    """
+    Lowercase code, keeping every character at its position
+    
+    Args:
+        code: Code
+        
+    Returns:
+        Lowercased code of the same length
+    """
+    code_lc = code.lower()
+    if len(code_lc) == len(code):
+        return code_lc
+    
+    # A few characters lowercase to several (e.g. U+0130), keep those as they are
+    return ''.join(char if len(char.lower()) != 1 else char.lower() for char in code)
+
+
+def _group_text(code: str, match: re.Match, group: int) -> str:
+    """
+    Get the text of a match group from the original code
+    
+    Patterns run on the lowercased code, so group text is sliced from the original code by
+    position. This is why matches are iterated rather than collected with findall, whose tuples
+    would hold lowercased text.
+    
+    Args:
+        code: Original code the lowercased text was matched in
+        match: Match in the lowercased code
+        group: Group number
+        
+    Returns:
+        Group text in its original case
+    """
+    return code[match.start(group):match.end(group)]
+
+
+# Operations in the order they are recorded, JOIN counts as SELECT
+_OPERATIONS = ("SELECT", "SELECT", "UPDATE", "INSERT", "DELETE", "CREATE VIEW", "SELECT INTO")
+# Bit of each operation in _OPERATIONS, a table's operations are deduplicated with a bitmask
+_OPERATION_BITS = (1, 1, 2, 4, 8, 16, 32)
+_OPERATION_BIT = dict(zip(_OPERATIONS, _OPERATION_BITS))  # {operation: bit}
+
+# SELECT keyword and the whitespace after it
+_SELECT_RE = re.compile(r'select(\s+)')
+
+
+def _table_patterns_for(names: Optional[Tuple[str, ...]]) -> Tuple[re.Pattern, re.Pattern]:
+    """
+    Compile the patterns finding table references of a set of databases and libnames
+    
+    Args:
+        names: Lowercased databases and libnames, tables are referenced as name.table. None for
+            patterns taking any word as name, whose matches are then filtered by name
+        
+    Returns:
+        Tuple of the FROM/INTO reference pattern, whose groups are the keyword, name and table,
+        and the keyword operation pattern, whose alternative k (JOIN, UPDATE, INSERT, DELETE,
+        CREATE VIEW) captures the name and table in groups 2k-1 and 2k. The keyword operations
+        are a lookahead so operations overlapping each other (e.g. a table named insert) are all found
+    """
+    if names is None:
+        reference = r'(\w+)\.(\w+)'
+    else:
+        # Names come from the SAS code and are matched literally
+        alternatives = '|'.join(map(re.escape, names))
+        reference = fr'({alternatives})\.(\w+)'
+    return (
+        _pattern_engine.compile(fr'(?<=\s)(from|into)\s+{reference}'),
+        _pattern_engine.compile(
+            r'(?='
+            # JOIN operations
+            fr'join\s+{reference}'
+            # UPDATE operations
+            fr'|update\s+{reference}'
+            # INSERT operations
+            fr'|insert\s+(?:into\s+)?{reference}'
+            # DELETE operations
+            fr'|delete\s+from\s+{reference}'
+            # CREATE VIEW operations
+            fr'|create\s+view\s+{reference}'
+            r')'
+        ),
+    )
+
+
+# Patterns for databases and libnames that are plain words, shared by every analysis so their
+# name sets need no patterns of their own
+_ANY_NAME_TABLE_PATTERNS = _table_patterns_for(None)
+_NAME_RE = re.compile(r'\w+')
+
+# Reference pattern, keyword pattern and the names their matches are filtered by (None if the
+# patterns only match the names)
+TablePatterns = Tuple[re.Pattern, re.Pattern, Optional[FrozenSet[str]]]
+
+
+def _match_selects(selects: List[Tuple[int, int]], references: List[Tuple[int, str, int]]) -> List[str]:
+    """
+    Pair FROM or INTO references with the SELECT before them
+    
+    Gives the tables a lazy "select ... from name.table" (or into) regex finds, without its
+    scan from every SELECT that makes the regex quadratic.
+    
+    Args:
+        selects: (start, end of the whitespace after it) of each SELECT keyword, in order
+        references: (keyword start, table, end) of the references to one name, in order
+        
+    Returns:
+        List of table names
+    """
+    select_starts = [start for start, _ in selects]
+    reference_starts = [start for start, _, _ in references]
+    
+    tables = []
+    pos = 0
+    while True:
+        index = bisect.bisect_left(select_starts, pos)
+        if index == len(selects):
+            break
+        select_start, whitespace_end = selects[index]
+        
+        # Like the regex, the first SELECT after the previous match takes the first reference
+        # past its whitespace and at least one more character
+        reference_index = bisect.bisect_left(reference_starts, whitespace_end + 2)
+        if reference_index == len(references):
+            # Failing that, a reference right after its whitespace, which is then split between
+            # the SELECT and the FROM, so it needs at least two characters
+            reference_index = bisect.bisect_left(reference_starts, whitespace_end)
+            if (whitespace_end - select_start - len('select') < 2
+                    or reference_index == len(references)
+                    or reference_starts[reference_index] != whitespace_end):
+                break
+        
+        _, table_name, pos = references[reference_index]
+        tables.append(table_name)
+    
+    return tables
+
+
+def _new_operation_tables() -> List[List[str]]:
+    """
+    Create the tables of each operation in _OPERATIONS found for a name
+    
+    Returns:
+        Empty list of tables per operation
+    """
+    return [[] for _ in _OPERATIONS]
+
+
+def _find_operations(patterns: TablePatterns, sql_code: str, sql_code_lc: str) -> Dict[str, List[List[str]]]:
+    """
+    Find the table operations of all databases and libnames in SQL code
+    
+    Args:
+        patterns: Table patterns of the databases and libnames
+        sql_code: SQL code
+        sql_code_lc: Lowercased SQL code
+        
+    Returns:
+        Dictionary {name: tables of each operation in _OPERATIONS}
+    """
+    reference_pattern, keyword_pattern, names = patterns
+    # A module-level factory keeps the result picklable for worker processes
+    found = defaultdict(_new_operation_tables)
+    
+    # Like separate scans per name and operation, matches of the same name and operation don't overlap
+    match_ends = {}
+    for match in keyword_pattern.finditer(sql_code_lc):
+        group = match.lastindex
+        name = match.group(group - 1)
+        if names is not None and name not in names:
+            continue
+        if match.start() < match_ends.get((name, group), 0):
+            continue
+        match_ends[(name, group)] = match.end(group)
+        
+        found[name][group // 2].append(_group_text(sql_code, match, group))
+    
+    selects = [match.span() for match in _SELECT_RE.finditer(sql_code_lc)]
+    if selects:
+        references = defaultdict(list)  # {(name, keyword): [(keyword start, table, end)]}
+        for match in reference_pattern.finditer(sql_code_lc):
+            if names is not None and match.group(2) not in names:
+                continue
+            references[match.group(2), match.group(1)].append(
+                (match.start(), _group_text(sql_code, match, 3), match.end())
+            )
+        
+        for (name, keyword), name_references in references.items():
+            found[name][0 if keyword == 'from' else -1] = _match_selects(selects, name_references)
+    
+    return found
+
+
+def _iter_operations(tables: Optional[List[List[str]]]) -> Iterator[Tuple[str, int, str]]:
+    """
+    Iterate over found table operations in the order of _OPERATIONS
+    
+    Args:
+        tables: Tables of each operation, None if nothing was found
+        
+    Yields:
+        Tuple of operation, its bit in _OPERATION_BITS and table name
+    """
+    if tables:
+        for operation, bit, operation_tables in zip(_OPERATIONS, _OPERATION_BITS, tables):
+            for table_name in operation_tables:
+                yield operation, bit, table_name
 
 
 class DatabaseAnalyzer:
     """Database Analyzer"""
     
-    def __init__(self, code: str):
+    def __init__(self, code: str, engine: Optional['DatabaseAnalyzerEngine'] = None):
         """
         Initialize database analyzer
         
         Args:
             code: SAS code
+            engine: Engine sharing compiled patterns across analyses, the default engine if omitted
         """
         self.code = code
+        self.engine = engine or _DEFAULT_ENGINE
+        self._code_lc = _lower(code)  # Lowercased code the patterns are matched against
         self.databases = []
         self.variables = {}  # Store variable definitions
     
-    def _parse_variables(self):
-        """Parse SAS variable definitions"""
-        # Match variable definition pattern %let varname = value;
-        variable_pattern = r'%let\s+(\w+)\s*=\s*([^;]+);'
-        matches = re.finditer(variable_pattern, self.code, re.IGNORECASE)
+    def _scan_definitions(self) -> Tuple[List[re.Match], List[re.Match], List[re.Match]]:
+        """
+        Find variable definitions and LIBNAME commands in a single pass over the code
+        
+        Returns:
+            Matches of %let statements, Teradata LIBNAME commands and generic LIBNAME commands
+        """
+        statements = ([], [], [])
+        # Substring checks are much cheaper than a regex scan that finds nothing
+        if '%let' not in self._code_lc and 'libname' not in self._code_lc:
+            return statements
         
+        variables, teradata_libnames, libnames = statements
+        # Statements of one kind never overlap, statements of different kinds may
+        variable_end = teradata_end = libname_end = 0
+        for match in _DEFINITION_RE.finditer(self._code_lc):
+            start = match.start()
+            if match.start(2) >= 0 and start >= variable_end:
+                variables.append(match)
+                variable_end = match.end(2) + 1
+            
+            if match.start(6) < 0:
+                continue
+            # A Teradata LIBNAME needs whitespace after its type, a generic one can't use a variable as name
+            if match.group(4) == 'teradata' and match.start(5) < match.end(5) and start >= teradata_end:
+                teradata_libnames.append(match)
+                teradata_end = match.end(6) + 1
+            if match.group(3)[0] != '&' and start >= libname_end:
+                libnames.append(match)
+                libname_end = match.end(6) + 1
+        
+        return statements
+    
+    def _parse_variables(self, matches: List[re.Match]):
+        """
+        Parse SAS variable definitions
+        
+        Args:
+            matches: Matches of %let statements from _scan_definitions
+        """
         for match in matches:
-            var_name = match.group(1).strip()
-            value = match.group(2).strip()
+            var_name = _group_text(self.code, match, 1).strip()
+            value = _group_text(self.code, match, 2).strip()
             self.variables[var_name] = value
     
     def _resolve_variable(self, var_ref: str) -> str:
@@ -48,29 +350,29 @@ class DatabaseAnalyzer:
             return self.variables.get(var_name, var_ref)
         return var_ref
     
-    def _parse_generic_libname(self) -> List[Dict[str, Any]]:
+    def _parse_generic_libname(self, matches: List[re.Match]) -> List[Dict[str, Any]]:
         """
         Parse generic external database LIBNAME commands
         
+        Args:
+            matches: Matches of generic LIBNAME commands from _scan_definitions
+            
         Returns:
             List of database information
         """
         databases = []
         
-        # Match LIBNAME command pattern
-        libname_pattern = r'libname\s+(\w+)\s+(\w+)([^;]*);'
-        matches = re.finditer(libname_pattern, self.code, re.IGNORECASE)
-        
         for match in matches:
-            db_name = match.group(1).strip()
-            db_type = match.group(2).strip()
-            
             # Skip Teradata type, this will be handled in a dedicated function
-            if db_type.upper() == 'TERADATA':
+            if match.group(4) == 'teradata':
                 continue
+            
+            db_name = _group_text(self.code, match, 3).strip()
+            # Few distinct types recur across many LIBNAME commands, share one string per type
+            db_type = sys.intern(_group_text(self.code, match, 4).strip())
                 
             # Get connection details
-            connection_detail = match.group(3).strip() if match.group(3) else ""
+            connection_detail = _group_text(self.code, match, 6).strip()
             
             # Add database information
             databases.append({
@@ -82,34 +384,34 @@ class DatabaseAnalyzer:
         
         return databases
     
-    def _parse_teradata_libname(self) -> List[Dict[str, Any]]:
+    def _parse_teradata_libname(self, matches: List[re.Match]) -> List[Dict[str, Any]]:
         """
         Parse Teradata LIBNAME commands
         
+        Args:
+            matches: Matches of Teradata LIBNAME commands from _scan_definitions
+            
         Returns:
             List of database information
         """
         databases = []
-        
-        # Match Teradata LIBNAME command pattern (case insensitive)
-        teradata_pattern = r'libname\s+(\w+|\&\w+)\s+TERADATA\s+([^;]*);'
-        matches = re.finditer(teradata_pattern, self.code, re.IGNORECASE)
+        variables = self.variables
         
         for match in matches:
-            table_name = match.group(1).strip()
-            connection_info = match.group(2).strip()
+            table_name = _group_text(self.code, match, 3).strip()
+            connection_info = _group_text(self.code, match, 6).strip()
             
-            # Resolve variable reference
-            if table_name.startswith('&'):
-                table_name = self._resolve_variable(table_name)
+            # Resolve variable reference (same as _resolve_variable, inlined)
+            if table_name[:1] == '&':
+                table_name = variables.get(table_name[1:], table_name)
             
             # Try to extract schema from connection info
-            schema_match = re.search(r'schema\s*=\s*["\']?([^"\'\s;]+)["\']?', connection_info, re.IGNORECASE)
-            db_name = schema_match.group(1) if schema_match else "UNKNOWN"
+            schema_match = _SCHEMA_RE.search(self._code_lc, match.start(6), match.end(6))
+            db_name = _group_text(self.code, schema_match, 1) if schema_match else "UNKNOWN"
             
             # If schema itself is a variable reference, resolve it
-            if db_name.startswith('&'):
-                db_name = self._resolve_variable(db_name)
+            if db_name[:1] == '&':
+                db_name = variables.get(db_name[1:], db_name)
             
             # Add database information
             databases.append({
@@ -124,225 +426,153 @@ class DatabaseAnalyzer:
         
         return databases
     
+    def _iter_sql_blocks(self) -> Iterator[Tuple[str, str]]:
+        """
+        Find the code of all PROC SQL blocks
+        
+        Each block start is located with a pattern and its end with a plain search for quit;,
+        so a block is scanned once without a lazy match over its whole body. The start pattern
+        keeps any whitespace between proc and sql allowed; its literal proc prefix is already
+        searched for in C, so a str.find prefilter would not make it faster.
+        
+        Yields:
+            Tuple of the code between proc sql; and quit; and its lowercased copy
+        """
+        code_lc = self._code_lc
+        pos = 0
+        while True:
+            start_match = _SQL_START_RE.search(code_lc, pos)
+            if not start_match:
+                return
+            start = start_match.end()
+            end = code_lc.find('quit;', start)
+            if end < 0:
+                return
+            yield self.code[start:end], code_lc[start:end]
+            pos = end + len('quit;')
+    
+    def _find_block_operations(self, patterns: TablePatterns) -> List[Dict[str, List[List[str]]]]:
+        """
+        Find the table operations of every PROC SQL block, in worker processes for large code
+        
+        Args:
+            patterns: Table patterns of the databases and libnames
+            
+        Returns:
+            Table operations found in each block, in block order
+        """
+        blocks = list(self._iter_sql_blocks())
+        workers = min(len(blocks), os.cpu_count() or 1)
+        if len(self.code) >= PARALLEL_MIN_CODE_SIZE and len(blocks) >= PARALLEL_MIN_BLOCKS and workers > 1:
+            sql_codes, sql_codes_lc = zip(*blocks)
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as executor:
+                    return list(executor.map(
+                        _find_operations, [patterns] * len(blocks), sql_codes, sql_codes_lc,
+                        chunksize=max(1, len(blocks) // (workers * 4))
+                    ))
+            except (OSError, AssertionError, BrokenProcessPool) as e:
+                # e.g. daemonic processes such as Celery workers can't start child processes
+                logger.warning(f"Error starting worker processes, analyzing PROC SQL blocks sequentially: {str(e)}")
+        
+        return [_find_operations(patterns, sql_code, sql_code_lc) for sql_code, sql_code_lc in blocks]
+    
     def _extract_sql_operations(self):
         """Extract SQL operations and populate database information"""
-        # Find all PROC SQL blocks
-        sql_blocks_pattern = r'proc\s+sql;(.*?)quit;'
-        sql_blocks = re.finditer(sql_blocks_pattern, self.code, re.IGNORECASE | re.DOTALL)
+        # Every PROC SQL block ends with quit;
+        if not self.databases or 'quit;' not in self._code_lc:
+            return
         
-        for sql_block_match in sql_blocks:
-            sql_code = sql_block_match.group(1)
+        # Each database with the lowercased names its tables are referenced through and its tables
+        # as parallel arrays of names, operations and operation bitmasks indexed by name, so
+        # merging needs no list scans. A TERADATA database is referenced through its libname
+        # tables, each also recording the operations on its tables, then through its own name
+        db_infos = []
+        names = set()
+        for db in self.databases:
+            name = db["databaseName"].lower()
+            names.add(name)
+            
+            table_names = []
+            table_ops = []
+            table_masks = []
+            table_index = {}
+            for table_info in db["operationTables"]:
+                table_index.setdefault(table_info["tableName"], len(table_names))
+                table_names.append(table_info["tableName"])
+                table_ops.append(table_info["operations"])
+                mask = 0
+                for operation in table_info["operations"]:
+                    mask |= _OPERATION_BIT[operation]
+                table_masks.append(mask)
+            
+            sources = []  # (index of the libname table or None, lowercased name)
+            if db["databaseType"] == "TERADATA":
+                for index, table_name in enumerate(table_names):
+                    sources.append((index, table_name.lower()))
+                    names.add(table_name.lower())
+            sources.append((None, name))
+            
+            db_infos.append((db, sources, (table_names, table_ops, table_masks, table_index)))
+        
+        # One set of patterns covers every database, so each SQL block is scanned once
+        patterns = self.engine.table_patterns(names)
+        
+        for found in self._find_block_operations(patterns):
+            if not found:
+                continue
             
             # Process table operations for each database
-            for db in self.databases:
-                db_name = db["databaseName"]
-                table_ops = {}  # Temporary storage for table information {table_name: [operations]}
-                
-                # For TERADATA type databases, also process tables defined in libname
-                if db["databaseType"] == "TERADATA":
-                    for table_info in db["operationTables"]:
-                        libname_table = table_info["tableName"]
-                        
-                        # Record libname table operations
-                        if "operations" not in table_info or not table_info["operations"]:
-                            table_info["operations"] = []
-                        
-                        # Extract operations related to this libname
-                        # Find SELECT operations
-                        select_pattern = r'select\s+.*?\s+from\s+(?:' + libname_table + r'\.)(\w+)'
-                        select_matches = re.finditer(select_pattern, sql_code, re.IGNORECASE | re.DOTALL)
-                        for select_match in select_matches:
-                            table_name = select_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "SELECT" not in table_ops[table_name]:
-                                table_ops[table_name].append("SELECT")
-                            # Add query operation to libname table
-                            if "SELECT" not in table_info["operations"]:
-                                table_info["operations"].append("SELECT")
-                        
-                        # Find JOIN operations
-                        join_pattern = r'join\s+(?:' + libname_table + r'\.)(\w+)'
-                        join_matches = re.finditer(join_pattern, sql_code, re.IGNORECASE)
-                        for join_match in join_matches:
-                            table_name = join_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "SELECT" not in table_ops[table_name]:
-                                table_ops[table_name].append("SELECT")
-                            # Add query operation to libname table
-                            if "SELECT" not in table_info["operations"]:
-                                table_info["operations"].append("SELECT")
+            for db, sources, (table_names, table_ops, table_masks, table_index) in db_infos:
+                for libname_index, source in sources:
+                    for operation, bit, table_name in _iter_operations(found.get(source)):
+                        # Add the operation to libname table
+                        if libname_index is not None and not table_masks[libname_index] & bit:
+                            table_masks[libname_index] |= bit
+                            table_ops[libname_index].append(operation)
                         
-                        # Find UPDATE operations
-                        update_pattern = r'update\s+(?:' + libname_table + r'\.)(\w+)'
-                        update_matches = re.finditer(update_pattern, sql_code, re.IGNORECASE)
-                        for update_match in update_matches:
-                            table_name = update_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "UPDATE" not in table_ops[table_name]:
-                                table_ops[table_name].append("UPDATE")
-                            # Add update operation to libname table
-                            if "UPDATE" not in table_info["operations"]:
-                                table_info["operations"].append("UPDATE")
+                        index = table_index.get(table_name)
                         
-                        # Find INSERT operations
-                        insert_pattern = r'insert\s+(?:into\s+)?(?:' + libname_table + r'\.)(\w+)'
-                        insert_matches = re.finditer(insert_pattern, sql_code, re.IGNORECASE)
-                        for insert_match in insert_matches:
-                            table_name = insert_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "INSERT" not in table_ops[table_name]:
-                                table_ops[table_name].append("INSERT")
-                            # Add insert operation to libname table
-                            if "INSERT" not in table_info["operations"]:
-                                table_info["operations"].append("INSERT")
+                        # Add new table
+                        if index is None:
+                            index = table_index[table_name] = len(table_names)
+                            table_names.append(table_name)
+                            table_ops.append([])
+                            table_masks.append(0)
                         
-                        # Find DELETE operations
-                        delete_pattern = r'delete\s+from\s+(?:' + libname_table + r'\.)(\w+)'
-                        delete_matches = re.finditer(delete_pattern, sql_code, re.IGNORECASE)
-                        for delete_match in delete_matches:
-                            table_name = delete_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "DELETE" not in table_ops[table_name]:
-                                table_ops[table_name].append("DELETE")
-                            # Add delete operation to libname table
-                            if "DELETE" not in table_info["operations"]:
-                                table_info["operations"].append("DELETE")
-                        
-                        # Find CREATE VIEW operations
-                        create_view_pattern = r'create\s+view\s+(?:' + libname_table + r'\.)(\w+)'
-                        create_view_matches = re.finditer(create_view_pattern, sql_code, re.IGNORECASE)
-                        for create_view_match in create_view_matches:
-                            table_name = create_view_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "CREATE VIEW" not in table_ops[table_name]:
-                                table_ops[table_name].append("CREATE VIEW")
-                            # Add view operation to libname table
-                            if "CREATE VIEW" not in table_info["operations"]:
-                                table_info["operations"].append("CREATE VIEW")
-                        
-                        # Find SELECT INTO operations
-                        select_into_pattern = r'select\s+.*?\s+into\s+(?:' + libname_table + r'\.)(\w+)'
-                        select_into_matches = re.finditer(select_into_pattern, sql_code, re.IGNORECASE | re.DOTALL)
-                        for select_into_match in select_into_matches:
-                            table_name = select_into_match.group(1)
-                            if table_name not in table_ops:
-                                table_ops[table_name] = []
-                            if "SELECT INTO" not in table_ops[table_name]:
-                                table_ops[table_name].append("SELECT INTO")
-                            # Add query and insert operation to libname table
-                            if "SELECT INTO" not in table_info["operations"]:
-                                table_info["operations"].append("SELECT INTO")
-                
-                # Regular database queries
-                # Find SELECT operations
-                select_pattern = r'select\s+.*?\s+from\s+(?:' + db_name + r'\.)(\w+)'
-                select_matches = re.finditer(select_pattern, sql_code, re.IGNORECASE | re.DOTALL)
-                for select_match in select_matches:
-                    table_name = select_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "SELECT" not in table_ops[table_name]:
-                        table_ops[table_name].append("SELECT")
-                
-                # Find JOIN operations
-                join_pattern = r'join\s+(?:' + db_name + r'\.)(\w+)'
-                join_matches = re.finditer(join_pattern, sql_code, re.IGNORECASE)
-                for join_match in join_matches:
-                    table_name = join_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "SELECT" not in table_ops[table_name]:
-                        table_ops[table_name].append("SELECT")
-                
-                # Find UPDATE operations
-                update_pattern = r'update\s+(?:' + db_name + r'\.)(\w+)'
-                update_matches = re.finditer(update_pattern, sql_code, re.IGNORECASE)
-                for update_match in update_matches:
-                    table_name = update_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "UPDATE" not in table_ops[table_name]:
-                        table_ops[table_name].append("UPDATE")
-                
-                # Find INSERT operations
-                insert_pattern = r'insert\s+(?:into\s+)?(?:' + db_name + r'\.)(\w+)'
-                insert_matches = re.finditer(insert_pattern, sql_code, re.IGNORECASE)
-                for insert_match in insert_matches:
-                    table_name = insert_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "INSERT" not in table_ops[table_name]:
-                        table_ops[table_name].append("INSERT")
-                
-                # Find DELETE operations
-                delete_pattern = r'delete\s+from\s+(?:' + db_name + r'\.)(\w+)'
-                delete_matches = re.finditer(delete_pattern, sql_code, re.IGNORECASE)
-                for delete_match in delete_matches:
-                    table_name = delete_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "DELETE" not in table_ops[table_name]:
-                        table_ops[table_name].append("DELETE")
-                
-                # Find CREATE VIEW operations
-                create_view_pattern = r'create\s+view\s+(?:' + db_name + r'\.)(\w+)'
-                create_view_matches = re.finditer(create_view_pattern, sql_code, re.IGNORECASE)
-                for create_view_match in create_view_matches:
-                    table_name = create_view_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "CREATE VIEW" not in table_ops[table_name]:
-                        table_ops[table_name].append("CREATE VIEW")
-                
-                # Find SELECT INTO operations
-                select_into_pattern = r'select\s+.*?\s+into\s+(?:' + db_name + r'\.)(\w+)'
-                select_into_matches = re.finditer(select_into_pattern, sql_code, re.IGNORECASE | re.DOTALL)
-                for select_into_match in select_into_matches:
-                    table_name = select_into_match.group(1)
-                    if table_name not in table_ops:
-                        table_ops[table_name] = []
-                    if "SELECT INTO" not in table_ops[table_name]:
-                        table_ops[table_name].append("SELECT INTO")
-                
-                # Update database table operation information
-                for table_name, operations in table_ops.items():
-                    # Check if table already exists
-                    table_exists = False
-                    for table_info in db["operationTables"]:
-                        if table_info["tableName"] == table_name:
-                            # Merge operations
-                            for op in operations:
-                                if op not in table_info["operations"]:
-                                    table_info["operations"].append(op)
-                            table_exists = True
-                            break
-                    
-                    # Add new table
-                    if not table_exists:
-                        db["operationTables"].append({
-                            "tableName": table_name,
-                            "operations": operations
-                        })
-    
-    def analyze(self) -> str:
+                        # Merge operations
+                        if not table_masks[index] & bit:
+                            table_masks[index] |= bit
+                            table_ops[index].append(operation)
+        
+        # Back to the output layout
+        for db, _, (table_names, table_ops, _, _) in db_infos:
+            db["operationTables"] = [
+                {"tableName": table_name, "operations": operations}
+                for table_name, operations in zip(table_names, table_ops)
+            ]
+    
+    def find_databases(self) -> List[Dict[str, Any]]:
         """
-        Analyze database usage in SAS code
+        Find database usage in SAS code
         
         Returns:
-            Database usage information in JSON format
+            List of database usage information
         """
+        # Every database is defined by a LIBNAME command, code without one (e.g. only DATA steps)
+        # uses none and its variables don't matter
+        if 'libname' not in self._code_lc:
+            self.databases = []
+            return self.databases
+        
+        variable_matches, teradata_matches, libname_matches = self._scan_definitions()
+        
         # Parse variable definitions
-        self._parse_variables()
+        self._parse_variables(variable_matches)
         
         # Parse database definitions
-        generic_dbs = self._parse_generic_libname()
-        teradata_dbs = self._parse_teradata_libname()
+        generic_dbs = self._parse_generic_libname(libname_matches)
+        teradata_dbs = self._parse_teradata_libname(teradata_matches)
         
         # Merge all database information
         self.databases = generic_dbs + teradata_dbs
@@ -350,26 +580,129 @@ class DatabaseAnalyzer:
         # Extract SQL operations
         self._extract_sql_operations()
         
-        # Filter out tables with no operations
+        # Filter out tables with no operations, and databases left without tables, in one pass
+        databases = []
         for db in self.databases:
-            db["operationTables"] = [table for table in db["operationTables"] if table["operations"]]
+            tables = [table for table in db["operationTables"] if table["operations"]]
+            if tables:
+                db["operationTables"] = tables
+                databases.append(db)
+        self.databases = databases
+        
+        return self.databases
+    
+    def analyze(self, pretty: bool = False) -> str:
+        """
+        Analyze database usage in SAS code
+        
+        Args:
+            pretty: Whether to indent the JSON for reading, compact JSON otherwise
+            
+        Returns:
+            Database usage information in JSON format
+        """
+        return orjson.dumps(self.find_databases(), option=orjson.OPT_INDENT_2 if pretty else 0).decode()
+
+
+class DatabaseAnalyzerEngine:
+    """Database analysis engine, keeps compiled table patterns warm across many SAS files"""
+    
+    def __init__(self, cache_size: int = 512):
+        """
+        Initialize database analysis engine
+        
+        Args:
+            cache_size: Number of database name sets whose compiled patterns are kept, for sets
+                with names that aren't plain words. Files of a workload share few database names
+                but combine them in many ways
+        """
+        self.compiled_patterns = functools.lru_cache(maxsize=cache_size)(_table_patterns_for)
+    
+    def table_patterns(self, names: Set[str]) -> TablePatterns:
+        """
+        Get the patterns finding table references of a set of databases and libnames
+        
+        Args:
+            names: Lowercased databases and libnames
             
-        # Filter out databases with no table operations
-        self.databases = [db for db in self.databases if db["operationTables"]]
+        Returns:
+            Table patterns and the names to filter their matches by
+        """
+        # Plain word names, the usual case, need no compiling at all
+        if all(_NAME_RE.fullmatch(name) for name in names):
+            return _ANY_NAME_TABLE_PATTERNS + (frozenset(names),)
+        return self.compiled_patterns(tuple(sorted(names))) + (None,)
+    
+    def analyze(self, code: str, pretty: bool = False) -> str:
+        """
+        Analyze database usage in SAS code
         
-        # Return results in JSON format
-        return json.dumps(self.databases, indent=2)
+        Args:
+            code: SAS code
+            pretty: Whether to indent the JSON for reading, compact JSON otherwise
+            
+        Returns:
+            Database usage information in JSON format
+        """
+        return DatabaseAnalyzer(code, self).analyze(pretty)
+    
+    def analyze_obj(self, code: str) -> List[Dict[str, Any]]:
+        """
+        Analyze database usage in SAS code without serializing the result
+        
+        Args:
+            code: SAS code
+            
+        Returns:
+            List of database usage information
+        """
+        return DatabaseAnalyzer(code, self).find_databases()
+    
+    def analyze_batch(self, codes: List[str], max_workers: Optional[int] = None) -> List[str]:
+        """
+        Analyze database usage in many SAS files
+        
+        Args:
+            codes: SAS code of each file
+            max_workers: Number of threads analyzing files concurrently, files are analyzed one
+                after another if omitted. Matching holds the GIL, so threads mainly help callers
+                whose files are produced concurrently
+            
+        Returns:
+            Database usage information in JSON format, in the order of codes
+        """
+        if not max_workers or max_workers <= 1 or len(codes) <= 1:
+            return [self.analyze(code) for code in codes]
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.analyze, codes))
+
+
+_DEFAULT_ENGINE = DatabaseAnalyzerEngine()
 
 
-def analyze_database_usage(code: str) -> str:
+def analyze_database_usage(code: str, pretty: bool = False) -> str:
     """
     Analyze database usage in SAS code
     
     Args:
         code: SAS code
+        pretty: Whether to indent the JSON for reading, compact JSON otherwise
         
     Returns:
         Database usage information in JSON format
     """
-    analyzer = DatabaseAnalyzer(code)
-    return analyzer.analyze() 
\ No newline at end of file
+    return _DEFAULT_ENGINE.analyze(code, pretty)
+
+
+def analyze_database_usage_obj(code: str) -> List[Dict[str, Any]]:
+    """
+    Analyze database usage in SAS code without serializing the result
+    
+    Args:
+        code: SAS code
+        
+    Returns:
+        List of database usage information
+    """
+    return _DEFAULT_ENGINE.analyze_obj(code)
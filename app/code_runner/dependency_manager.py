@@ -5,19 +5,48 @@ Used to parse and install dependencies for Python scripts
 """
 import os
 import re
+import ast
 import sys
+import importlib.util
 import subprocess
 import tempfile
 import logging
 from typing import List, Set, Dict, Any, Optional
+from .output_lines import iter_output_lines
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the application, e.g. the API server or the CLI
 logger = logging.getLogger(__name__)
 
+# Import statements, matched at line starts over the whole code when it can't be parsed
+# import a, b.c as d: every imported module, with its optional alias
+_IMPORT_RE = re.compile(
+    r'^[ \t]*import[ \t]+([a-zA-Z0-9_.]+(?:[ \t]+as[ \t]+\w+)?'
+    r'(?:[ \t]*,[ \t]*[a-zA-Z0-9_.]+(?:[ \t]+as[ \t]+\w+)?)*)',
+    re.MULTILINE
+)
+# from a.b import c: the top level package
+_FROM_RE = re.compile(r'^[ \t]*from[ \t]+([a-zA-Z0-9_]+)(?:\.[a-zA-Z0-9_]+)*[ \t]+import', re.MULTILINE)
+
+# Standard library modules are never installed, Python 3.10+ lists all of them
+_STD_LIBS = getattr(sys, 'stdlib_module_names', None) or frozenset({
+    'os', 'sys', 're', 'math', 'datetime', 'time', 'json', 'csv', 'random',
+    'collections', 'itertools', 'functools', 'typing', 'pathlib', 'io',
+    'argparse', 'logging', 'unittest', 'tempfile', 'shutil', 'glob',
+    'pickle', 'hashlib', 'base64', 'uuid', 'copy', 'string', 'textwrap',
+    'calendar', 'contextlib', 'subprocess', 'threading', 'multiprocessing',
+    'queue', 'socket', 'email', 'urllib', 'http', 'html', 'xml', 'webbrowser',
+    'tkinter', 'asyncio', 'concurrent', 'zipfile', 'tarfile', 'gzip', 'bz2',
+    'lzma', 'zlib', 'struct', 'array', 'enum', 'statistics', 'traceback',
+    'pdb', 'profile', 'timeit', 'trace', 'warnings', 'weakref', 'platform',
+    'gc', 'inspect', 'ast', 'symtable', 'token', 'keyword', 'tokenize',
+    'tabnanny', 'pyclbr', 'py_compile', 'compileall', 'dis', 'pickletools'
+})
+
+# Prints the given packages the running Python can't find, to check a virtual environment in one run
+_FIND_MISSING_SCRIPT = (
+    "import importlib.util, sys; "
+    "print(' '.join(p for p in sys.argv[1:] if importlib.util.find_spec(p) is None))"
+)
 
 class DependencyManager:
     """Dependency Manager"""
@@ -31,7 +60,8 @@ class DependencyManager:
         """
         self.venv_path = venv_path
         self.python_executable = self._get_python_executable()
-        self.pip_executable = self._get_pip_executable()
+        self.pip_command = self._get_pip_command()
+        self.install_count = 0  # Number of pip install runs that have ended
         
     def _get_python_executable(self) -> str:
         """
@@ -46,20 +76,14 @@ class DependencyManager:
             return os.path.join(self.venv_path, 'bin', 'python')
         return sys.executable
     
-    def _get_pip_executable(self) -> str:
+    def _get_pip_command(self) -> List[str]:
         """
-        Get pip executable path
+        Get pip command arguments
         
         Returns:
-            pip executable path
+            pip command arguments, always python -m pip of the (virtual) environment's Python
         """
-        if self.venv_path:
-            if sys.platform == 'win32':
-                return os.path.join(self.venv_path, 'Scripts', 'pip.exe')
-            return os.path.join(self.venv_path, 'bin', 'pip')
-        
-        # Use Python -m pip
-        return f"{self.python_executable} -m pip"
+        return [self.python_executable, '-m', 'pip']
     
     def extract_imports(self, code: str) -> Set[str]:
         """
@@ -71,43 +95,74 @@ class DependencyManager:
         Returns:
             Set of imported packages
         """
-        # Match import statements
-        import_pattern = r'^import\s+([a-zA-Z0-9_]+)(?:\s*,\s*([a-zA-Z0-9_]+))*'
-        from_pattern = r'^from\s+([a-zA-Z0-9_]+)(?:\.[a-zA-Z0-9_]+)*\s+import'
+        try:
+            tree = ast.parse(code)
+        except (SyntaxError, ValueError):
+            # Code that doesn't parse still gets its import lines scanned
+            packages = self._scan_imports(code)
+        else:
+            packages = set()
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    packages.update(alias.name.split('.')[0] for alias in node.names)
+                # Relative imports are part of the script itself
+                elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                    packages.add(node.module.split('.')[0])
         
-        packages = set()
+        # Filter standard libraries
+        packages -= _STD_LIBS
+        return packages
+    
+    def find_missing_packages(self, packages: Set[str]) -> Set[str]:
+        """
+        Find packages not installed in the environment scripts run in, without importing them
         
-        for line in code.split('\n'):
-            line = line.strip()
+        Args:
+            packages: Set of packages
             
-            # Process import statements
-            import_match = re.match(import_pattern, line)
-            if import_match:
-                for group in import_match.groups():
-                    if group:
-                        packages.add(group)
+        Returns:
+            Set of packages that are not installed
+        """
+        if not self.venv_path:
+            return {package for package in packages if importlib.util.find_spec(package) is None}
+        
+        # Packages of a virtual environment are only visible to its own Python
+        try:
+            result = subprocess.run(
+                [self.python_executable, '-c', _FIND_MISSING_SCRIPT, *packages],
+                capture_output=True,
+                text=True
+            )
+        except OSError as e:
+            logger.error(f"Error checking installed packages: {str(e)}")
+            return set(packages)
+        
+        if result.returncode != 0:
+            logger.error(f"Error checking installed packages: {result.stdout}{result.stderr}")
+            return set(packages)
+        return set(result.stdout.split())
+    
+    def _scan_imports(self, code: str) -> Set[str]:
+        """
+        Scan import statements of code that is not valid Python line by line
+        
+        Args:
+            code: Python code
             
-            # Process from statements
-            from_match = re.match(from_pattern, line)
-            if from_match and from_match.group(1):
-                packages.add(from_match.group(1))
+        Returns:
+            Set of imported packages, including standard libraries
+        """
+        packages = set()
         
-        # Filter standard libraries
-        std_libs = {
-            'os', 'sys', 're', 'math', 'datetime', 'time', 'json', 'csv', 'random',
-            'collections', 'itertools', 'functools', 'typing', 'pathlib', 'io',
-            'argparse', 'logging', 'unittest', 'tempfile', 'shutil', 'glob',
-            'pickle', 'hashlib', 'base64', 'uuid', 'copy', 'string', 'textwrap',
-            'calendar', 'contextlib', 'subprocess', 'threading', 'multiprocessing',
-            'queue', 'socket', 'email', 'urllib', 'http', 'html', 'xml', 'webbrowser',
-            'tkinter', 'asyncio', 'concurrent', 'zipfile', 'tarfile', 'gzip', 'bz2',
-            'lzma', 'zlib', 'struct', 'array', 'enum', 'statistics', 'traceback',
-            'pdb', 'profile', 'timeit', 'trace', 'warnings', 'weakref', 'platform',
-            'gc', 'inspect', 'ast', 'symtable', 'token', 'keyword', 'tokenize',
-            'tabnanny', 'pyclbr', 'py_compile', 'compileall', 'dis', 'pickletools'
-        }
-        
-        return {pkg for pkg in packages if pkg not in std_libs}
+        # Process import statements, keeping the top level package of each imported module
+        for import_match in _IMPORT_RE.finditer(code):
+            for module in import_match.group(1).split(','):
+                packages.add(module.split()[0].split('.')[0])
+        
+        # Process from statements
+        packages.update(_FROM_RE.findall(code))
+        
+        return packages
     
     def install_dependencies(self, packages: Set[str], log_callback=None) -> bool:
         """
@@ -125,52 +180,47 @@ class DependencyManager:
                 log_callback("No dependencies detected to install")
             return True
         
-        # 检查是否已安装
-        packages_to_install = set()
-        for package in packages:
-            try:
-                # 尝试导入包
-                __import__(package)
-                if log_callback:
-                    log_callback(f"Package {package} is already installed")
-            except ImportError:
-                packages_to_install.add(package)
-                if log_callback:
+        # 检查是否已安装（只查找模块，不导入）
+        packages_to_install = self.find_missing_packages(packages)
+        if log_callback:
+            for package in packages:
+                if package in packages_to_install:
                     log_callback(f"Package {package} is not installed, will attempt to install")
+                else:
+                    log_callback(f"Package {package} is already installed")
         
         if not packages_to_install:
             if log_callback:
                 log_callback("All dependencies are already installed")
             return True
         
-        # Build pip install command
-        pip_cmd = f"{self.pip_executable} install {' '.join(packages_to_install)}"
+        # Build pip install command, arguments are passed as is without a shell
+        pip_cmd = self.pip_command + ['install', *sorted(packages_to_install)]
         
         if log_callback:
             log_callback(f"Installing dependencies: {', '.join(packages_to_install)}")
-            log_callback(f"Running command: {pip_cmd}")
+            log_callback(f"Running command: {subprocess.list2cmdline(pip_cmd)}")
         
         try:
-            # Execute pip install
+            # Execute pip install, its output is discarded unless something logs it
+            log_output = log_callback or (logger.info if logger.isEnabledFor(logging.INFO) else None)
             process = subprocess.Popen(
                 pip_cmd,
-                shell=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
+                stdout=subprocess.PIPE if log_output else subprocess.DEVNULL,
+                stderr=subprocess.STDOUT
             )
             
             # Read output
-            for line in process.stdout:
-                if log_callback:
-                    log_callback(line.strip())
-                else:
-                    logger.info(line.strip())
+            if log_output:
+                with process.stdout:
+                    for line in iter_output_lines(process.stdout):
+                        log_output(line)
             
             # Wait for process to complete
-            return_code = process.wait()
+            try:
+                return_code = process.wait()
+            finally:
+                self.install_count += 1
             
             if return_code == 0:
                 if log_callback:
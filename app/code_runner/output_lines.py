@@ -0,0 +1,131 @@
+"""
+Output Lines Module
+
+Used to split the output of child processes into log lines
+"""
+import os
+import re
+from typing import Iterator, List
+
+# Line breaks of process output, progress bars redraw their line with a bare \r
+_LINE_BREAK_RE = re.compile(r'\r\n|\r|\n')
+
+# Bytes of output kept for a line that has not ended, longer lines are passed on in pieces
+MAX_LINE_LENGTH = 1024 * 1024
+
+
+def _split_lines(data: bytes) -> List[str]:
+    """
+    Split process output ending with a line break into lines
+    
+    Args:
+        data: Output that ends with a line break
+        
+    Returns:
+        List of lines, stripped
+    """
+    # Line breaks never occur inside a multi-byte character, so the complete lines are
+    # decoded at once and split afterwards
+    text = data.decode(errors='replace')
+    lines = _LINE_BREAK_RE.split(text) if '\r' in text else text.split('\n')
+    lines.pop()
+    return [line.strip() for line in lines]
+
+
+class OutputSplitter:
+    """
+    Splitter of process output read in chunks into lines
+    
+    Only each new chunk is searched for line breaks, and the output of a line that has not
+    ended is kept in parts that are joined once it ends, so the time taken grows linearly
+    with the output even when it has no line breaks.
+    """
+    
+    __slots__ = ('_parts', '_size')
+    
+    def __init__(self):
+        """Initialize output splitter"""
+        self._parts = []  # Output of the line that has not ended yet
+        self._size = 0
+    
+    def feed(self, chunk: bytes) -> List[str]:
+        """
+        Add output read from a process
+        
+        Args:
+            chunk: Output read
+            
+        Returns:
+            List of the lines ended by the chunk, stripped
+        """
+        # A \r at the end of the chunk may be the first half of \r\n
+        cut = len(chunk) - 1 if chunk.endswith(b'\r') else len(chunk)
+        end = max(chunk.rfind(b'\n', 0, cut), chunk.rfind(b'\r', 0, cut)) + 1
+        
+        # A \r held back from the previous chunk ends its line unless the chunk starts with \n
+        if end == 0 and not (self._parts and self._parts[-1].endswith(b'\r')):
+            self._parts.append(chunk)
+            self._size += len(chunk)
+            if self._size > MAX_LINE_LENGTH:
+                return [self._take_piece()]
+            return []
+        
+        self._parts.append(chunk[:end])
+        data = b''.join(self._parts)
+        rest = chunk[end:]
+        self._parts = [rest] if rest else []
+        self._size = len(rest)
+        return _split_lines(data)
+    
+    def finish(self) -> List[str]:
+        """
+        End the output, passing on the line it did not end
+        
+        Returns:
+            List of the last line, stripped, or an empty list if the output ended with a line break
+        """
+        data = b''.join(self._parts)
+        self._parts = []
+        self._size = 0
+        return [data.decode(errors='replace').strip()] if data else []
+    
+    def _take_piece(self) -> str:
+        """
+        Take the kept output of a line that has grown too long, as a line of its own
+        
+        Returns:
+            The kept output, stripped, without a character cut off at its end
+        """
+        data = b''.join(self._parts)
+        
+        # Leave a UTF-8 character that may be incomplete for the next piece
+        cut = len(data)
+        while cut > len(data) - 3 and data[cut - 1] & 0xC0 == 0x80:
+            cut -= 1
+        if data[cut - 1] >= 0xC0:
+            cut -= 1
+        
+        rest = data[cut:]
+        self._parts = [rest] if rest else []
+        self._size = len(rest)
+        return data[:cut].decode(errors='replace').strip()
+
+
+def iter_output_lines(stream) -> Iterator[str]:
+    """
+    Read process output in large chunks and split it into lines
+    
+    Args:
+        stream: Binary output pipe of the process
+        
+    Yields:
+        Each output line, stripped
+    """
+    splitter = OutputSplitter()
+    while True:
+        chunk = os.read(stream.fileno(), 65536)
+        if not chunk:
+            break
+        yield from splitter.feed(chunk)
+    
+    yield from splitter.finish()
@@ -5,142 +5,367 @@ Used to run Python scripts and get real-time logs
 """
 import os
 import sys
-import uuid
 import time
 import signal
-import tempfile
+import secrets
+import selectors
 import threading
 import subprocess
 import logging
-from typing import Dict, List, Any, Optional, Callable, Tuple
-from queue import Queue, Empty
+from typing import Dict, List, Any, Optional, Callable
+from queue import Queue, Empty, Full
 from .dependency_manager import DependencyManager
+from .output_lines import OutputSplitter
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Logging is configured by the application, e.g. the API server or the CLI
 logger = logging.getLogger(__name__)
 
+# Seconds a script is given to exit after being asked to stop, and again after being killed
+STOP_TIMEOUT = 5
+
+# Batches of output lines kept for get_logs per script, each holds what one read returned (up to 64 KiB)
+OUTPUT_QUEUE_SIZE = 1000
+
+
+class _OutputStream:
+    """An output pipe of a running script"""
+    
+    __slots__ = ('pipe', 'name', 'prefix', 'script', 'splitter')
+    
+    def __init__(self, pipe, name: str, prefix: str, script: Dict[str, Any]):
+        """
+        Initialize output stream
+        
+        Args:
+            pipe: Binary output pipe of the process
+            name: Stream name used in log lines, stdout or stderr
+            prefix: Prefix added to each line read from the stream
+            script: Shared state of the script the stream belongs to
+        """
+        self.pipe = pipe
+        self.name = name
+        self.prefix = prefix
+        self.script = script
+        self.splitter = OutputSplitter()  # Keeps output read that does not end a line yet
+
+
+class _OutputReader:
+    """
+    Output reader of running scripts
+    
+    The stdout and stderr pipes of all scripts are watched with one selector on one background
+    thread, so the number of threads does not grow with the number of running scripts. Lines are
+    passed to the emit functions from that thread, which should therefore not block.
+    """
+    
+    def __init__(self):
+        """Initialize output reader, its thread is started with the first script"""
+        self._lock = threading.Lock()
+        self._thread = None
+        self._new_streams = []  # Streams added since the selector last woke up
+        self._exiting = []  # Scripts whose output has ended but whose process has not exited yet
+        
+        # Windows can only select on sockets, there each stream is read on its own thread instead
+        if sys.platform == 'win32':
+            self._selector = None
+        else:
+            self._selector = selectors.DefaultSelector()
+            self._wakeup_read, self._wakeup_write = os.pipe()
+            self._selector.register(self._wakeup_read, selectors.EVENT_READ)
+    
+    def add(self, process, emit: Callable[[List[str]], None], on_finished: Callable[[], None]):
+        """
+        Start reading the output of a process
+        
+        Args:
+            process: Child process with binary stdout and stderr pipes
+            emit: Function receiving the log lines read at once, as a list
+            on_finished: Called once all output has been read and the process has exited
+        """
+        script = {'process': process, 'emit': emit, 'on_finished': on_finished, 'open_streams': 2}
+        streams = [
+            _OutputStream(process.stdout, 'stdout', '', script),
+            _OutputStream(process.stderr, 'stderr', 'ERROR: ', script)
+        ]
+        for stream in streams:
+            self._emit(stream, [f"DEBUG: Starting to read {stream.name}"])
+        
+        if self._selector is None:
+            for stream in streams:
+                threading.Thread(target=self._read_until_closed, args=(stream,), daemon=True).start()
+            return
+        
+        with self._lock:
+            self._new_streams.extend(streams)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        os.write(self._wakeup_write, b'\0')
+    
+    def _run(self):
+        """Read output of all scripts as it becomes available"""
+        while True:
+            # Only scripts still exiting need to be checked without waiting for output
+            timeout = 0.05 if self._exiting else None
+            for key, _ in self._selector.select(timeout):
+                if key.data is None:
+                    os.read(self._wakeup_read, 4096)
+                    with self._lock:
+                        new_streams, self._new_streams = self._new_streams, []
+                    for stream in new_streams:
+                        self._selector.register(stream.pipe, selectors.EVENT_READ, stream)
+                else:
+                    self._read(key.data)
+            
+            if self._exiting:
+                self._exiting = [script for script in self._exiting if not self._finish(script)]
+    
+    def _read_until_closed(self, stream: _OutputStream):
+        """
+        Read a stream on the current thread until its output has ended
+        
+        Args:
+            stream: Output stream
+        """
+        while self._read(stream):
+            pass
+    
+    def _read(self, stream: _OutputStream) -> bool:
+        """
+        Read the available output of a stream and pass its complete lines to emit in one list
+        
+        Args:
+            stream: Output stream
+            
+        Returns:
+            Whether the stream is still open
+        """
+        try:
+            chunk = os.read(stream.pipe.fileno(), 65536)
+        except Exception as e:
+            logger.error(f"Error reading {stream.name}: {str(e)}")
+            self._close(stream)
+            return False
+        
+        if chunk:
+            lines = [stream.prefix + line for line in stream.splitter.feed(chunk) if line]
+            if lines:
+                self._emit(stream, lines)
+            return True
+        
+        lines = [stream.prefix + line for line in stream.splitter.finish() if line]
+        lines.append(f"DEBUG: Finished reading {stream.name}")
+        self._emit(stream, lines)
+        
+        self._close(stream)
+        return False
+    
+    def _emit(self, stream: _OutputStream, lines: List[str]):
+        """
+        Pass lines read from a stream to the emit function of its script
+        
+        A failing emit function loses only these lines, the stream is read on
+        
+        Args:
+            stream: Output stream
+            lines: Log lines
+        """
+        try:
+            stream.script['emit'](lines)
+        except Exception as e:
+            logger.error(f"Error passing on {stream.name} output: {str(e)}")
+    
+    def _close(self, stream: _OutputStream):
+        """
+        Stop reading a stream, finishing its script once both its streams are closed
+        
+        Args:
+            stream: Output stream
+        """
+        if self._selector is not None:
+            self._selector.unregister(stream.pipe)
+        stream.pipe.close()
+        
+        script = stream.script
+        with self._lock:
+            script['open_streams'] -= 1
+            if script['open_streams']:
+                return
+        
+        if self._selector is None:
+            script['process'].wait()
+            self._finish(script)
+        elif not self._finish(script):
+            self._exiting.append(script)
+    
+    def _finish(self, script: Dict[str, Any]) -> bool:
+        """
+        Call the finished callback of a script whose output has ended, if its process has exited
+        
+        Args:
+            script: Script state
+            
+        Returns:
+            Whether the process has exited
+        """
+        if script['process'].poll() is None:
+            return False
+        
+        try:
+            script['on_finished']()
+        except Exception as e:
+            logger.error(f"Error finishing script output: {str(e)}")
+        return True
+
 
 class ScriptRunner:
     """Python Script Runner"""
     
-    def __init__(self, venv_path: Optional[str] = None, scripts_dir: Optional[str] = None):
+    def __init__(self, venv_path: Optional[str] = None, prestart: bool = True):
         """
         Initialize script runner
         
         Args:
             venv_path: Virtual environment path, if None, use system Python environment
-            scripts_dir: Script storage directory, if None, use temporary directory
+            prestart: Whether to start the interpreter for the next script after each run, so it has
+                finished starting up by the time that script is run
         """
         self.venv_path = venv_path
-        self.scripts_dir = scripts_dir or tempfile.gettempdir()
+        self.prestart = prestart
         self.dependency_manager = DependencyManager(venv_path)
         self.running_scripts = {}  # Running scripts {script_id: process_info}
-        
-        # Create script directory
-        os.makedirs(self.scripts_dir, exist_ok=True)
+        self._output_reader = _OutputReader()
+        self._spare_lock = threading.Lock()
+        self._spare = None  # Prestarted interpreter and the dependency install count when it started
     
-    def _generate_script_id(self) -> str:
+    def generate_script_id(self) -> str:
         """
         Generate script ID
         
+        IDs are random rather than counted, as they give access to a script's logs and stopping it
+        
         Returns:
             Script ID
         """
-        return str(uuid.uuid4())
+        return secrets.token_hex(16)
     
-    def _save_script(self, code: str) -> Tuple[str, str]:
+    def _start_process(self):
         """
-        Save script to file
+        Start an interpreter that runs the code written to its standard input once it is closed
+        
+        Returns:
+            Child process
+        """
+        # The code is passed on standard input, so no script file is written. Output is read from
+        # the raw pipes in chunks. The script itself would buffer its output in blocks when writing
+        # to a pipe, PYTHONUNBUFFERED makes it write each line at once
+        return subprocess.Popen(
+            [self.dependency_manager.python_executable, '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+            env={**os.environ, 'PYTHONUNBUFFERED': '1'},
+            # Own process group, so stopping the script signals it and its children but never us
+            start_new_session=True
+        )
+    
+    def _take_process(self):
+        """
+        Get an interpreter to run a script in, the prestarted one if it can still be used
+        
+        Every interpreter runs a single script, so scripts never share modules or global state
         
-        Args:
-            code: Python code
-            
         Returns:
-            Tuple of script ID and script file path
+            Child process, and whether it is the prestarted one
         """
-        script_id = self._generate_script_id()
-        script_path = os.path.join(self.scripts_dir, f"{script_id}.py")
+        with self._spare_lock:
+            spare, self._spare = self._spare, None
         
-        with open(script_path, 'w', encoding='utf-8') as f:
-            f.write(code)
+        if spare is not None:
+            process, install_count = spare
+            if install_count == self.dependency_manager.install_count and process.poll() is None:
+                return process, True
+            
+            # Started before packages were installed, it would miss .pth files they added.
+            # With its input closed it runs no code and exits
+            process.stdin.close()
+            process.wait()
+            process.stdout.close()
+            process.stderr.close()
         
-        return script_id, script_path
+        return self._start_process(), False
     
-    def _read_output(self, process, output_queue: Queue, script_id: str):
+    def _prestart_process(self):
+        """Start the interpreter for the next script, unless one is already waiting"""
+        try:
+            with self._spare_lock:
+                if self._spare is None:
+                    self._spare = (self._start_process(), self.dependency_manager.install_count)
+        except Exception as e:
+            # The next script starts its own interpreter instead
+            logger.error(f"Error prestarting interpreter: {str(e)}")
+    
+    def _send_script(self, process, code: str):
         """
-        Read process output and put into queue
+        Write the script code to the standard input of the process, which runs it once it is closed
         
         Args:
-            process: Child process
-            output_queue: Output queue
-            script_id: Script ID
+            process: Child process started with python -
+            code: Python code
         """
+        data = memoryview(code.encode('utf-8'))
         try:
-            output_queue.put((script_id, "DEBUG: Starting to read stdout"))
-            
-            while True:
-                # 读取输出流
-                output = process.stdout.readline()
-                if not output:
-                    # 检查是否还有数据可读
-                    if process.poll() is not None:
-                        output_queue.put((script_id, f"DEBUG: Process ended with return code: {process.poll()}"))
-                        break
-                    # 短暂等待新数据
-                    time.sleep(0.01)
-                    continue
-                
-                # 处理输出
-                line = output.strip()
-                if line:
-                    output_queue.put((script_id, line))
-            
-            output_queue.put((script_id, "DEBUG: Finished reading stdout"))
-        except Exception as e:
-            output_queue.put((script_id, f"Error reading output: {str(e)}"))
+            # A raw pipe may take only part of the data in one write
+            while data:
+                data = data[process.stdin.write(data):]
+        except BrokenPipeError:
+            # The interpreter ended before reading the code, its error output is read as usual
+            pass
         finally:
-            process.stdout.close()
+            process.stdin.close()
     
-    def _read_error(self, process, output_queue: Queue, script_id: str):
+    def _finished_status(self, script_id: str, process, start_time: float) -> Dict[str, Any]:
         """
-        Read process error output and put into queue
+        Build the status of a script whose process has exited
         
         Args:
-            process: Child process
-            output_queue: Output queue
             script_id: Script ID
+            process: Child process, already waited for or polled
+            start_time: Time the script was started
+            
+        Returns:
+            Script status dictionary
+        """
+        now = time.time()
+        return {
+            'script_id': script_id,
+            'status': 'finished',
+            'return_code': process.returncode,
+            'start_time': start_time,
+            'end_time': now,
+            'run_time': now - start_time
+        }
+    
+    def _notify_finished(self, script_id: str, output_callback: Callable[..., None], status: Dict[str, Any]):
+        """
+        Signal the end of output once the script has ended
+        
+        Args:
+            script_id: Script ID
+            output_callback: Output callback, called with None as the lines once all output has been read
+            status: Final status of the script, passed to the callback
         """
         try:
-            output_queue.put((script_id, "DEBUG: Starting to read stderr"))
-            
-            while True:
-                # 读取错误流
-                error = process.stderr.readline()
-                if not error:
-                    # 检查是否还有数据可读
-                    if process.poll() is not None:
-                        output_queue.put((script_id, f"DEBUG: Process stderr ended with return code: {process.poll()}"))
-                        break
-                    # 短暂等待新数据
-                    time.sleep(0.01)
-                    continue
-                
-                # 处理错误输出
-                line = error.strip()
-                if line:
-                    output_queue.put((script_id, f"ERROR: {line}"))
-            
-            output_queue.put((script_id, "DEBUG: Finished reading stderr"))
+            output_callback(script_id, None, status)
         except Exception as e:
-            output_queue.put((script_id, f"Error reading error stream: {str(e)}"))
+            logger.error(f"Error in output callback: {str(e)}")
         finally:
-            process.stderr.close()
+            self._cleanup_script(script_id)
     
-    def run_script(self, code: str, log_callback: Optional[Callable[[str], None]] = None, skip_dependencies: bool = False) -> str:
+    def run_script(self, code: str, log_callback: Optional[Callable[[str], None]] = None, skip_dependencies: bool = False,
+                   output_callback: Optional[Callable[..., None]] = None,
+                   script_id: Optional[str] = None) -> str:
         """
         Run Python script
         
@@ -148,22 +373,28 @@ class ScriptRunner:
             code: Python code
             log_callback: Log callback function
             skip_dependencies: Whether to skip dependency installation
+            output_callback: Called from the reader thread with (script_id, lines) for the list of lines
+                of each read, and with (script_id, None, status) once the script has ended, status being its final
+                status dictionary. When set, output is pushed to this callback instead of being queued
+                for get_logs, and the script is cleaned up automatically. Also called with None and a
+                not_found status if the script could not be started
+            script_id: Script ID to use, lets callers know the ID before setup finishes. Generated if not given
             
         Returns:
             Script ID
         """
-        # Save script to file
-        script_id, script_path = self._save_script(code)
+        script_id = script_id or self.generate_script_id()
         
         if log_callback:
             log_callback(f"Script ID: {script_id}")
-            log_callback(f"Script saved to: {script_path}")
         
         # Prepare script environment
         if not skip_dependencies:
             if not self.dependency_manager.prepare_script(code, log_callback):
                 if log_callback:
                     log_callback("Failed to prepare script environment, cannot run script")
+                if output_callback:
+                    output_callback(script_id, None, self.get_script_status(script_id))
                 return script_id
         else:
             if log_callback:
@@ -174,58 +405,72 @@ class ScriptRunner:
         if log_callback:
             log_callback(f"Using Python executable: {python_executable}")
         
-        # Create output queue
-        output_queue = Queue()
+        # Create output queue, bounded so a script flooding its output cannot exhaust memory
+        output_queue = Queue(maxsize=OUTPUT_QUEUE_SIZE)
         
         try:
             # Start process
+            process, prestarted = self._take_process()
             if log_callback:
-                log_callback(f"Starting process: {python_executable} {script_path}")
+                if prestarted:
+                    log_callback(f"Using prestarted process: {python_executable} -")
+                else:
+                    log_callback(f"Started process: {python_executable} -")
             
-            process = subprocess.Popen(
-                [python_executable, script_path],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            self._send_script(process, code)
             
             if log_callback:
                 log_callback(f"Script started running, process ID: {process.pid}")
             
-            # Create threads to read output
-            stdout_thread = threading.Thread(
-                target=self._read_output,
-                args=(process, output_queue, script_id)
-            )
-            stderr_thread = threading.Thread(
-                target=self._read_error,
-                args=(process, output_queue, script_id)
-            )
+            # Push output to the callback if given, otherwise queue the lines of each read for get_logs
+            output_finished = threading.Event()
+            if output_callback:
+                def emit(lines):
+                    output_callback(script_id, lines)
+                
+                def on_finished():
+                    # Built before cleanup, stop_script may already have removed the script
+                    status = self._finished_status(script_id, process, script_info['start_time'])
+                    output_finished.set()
+                    self._notify_finished(script_id, output_callback, status)
+            else:
+                # Never blocks the reader thread shared by all scripts, when logs are not read in time
+                # the oldest lines are dropped and counted for get_logs to report
+                def emit(lines):
+                    while True:
+                        try:
+                            output_queue.put_nowait((script_id, lines))
+                            return
+                        except Full:
+                            try:
+                                script_info['dropped_lines'] += len(output_queue.get_nowait()[1])
+                            except Empty:
+                                pass
+                
+                on_finished = output_finished.set
             
-            # Set as daemon threads
-            stdout_thread.daemon = True
-            stderr_thread.daemon = True
+            # Save process information before reading starts, so a fast script is never missed
+            self.running_scripts[script_id] = script_info = {
+                'process': process,
+                'output_queue': output_queue,
+                'output_finished': output_finished,
+                'pushes_output': output_callback is not None,
+                'dropped_lines': 0,  # Only changed by the output reader
+                'reported_dropped_lines': 0,  # Only changed by get_logs
+                'start_time': time.time()
+            }
             
             if log_callback:
-                log_callback("Starting output reader threads")
+                log_callback("Starting output reader")
             
-            # Start threads
-            stdout_thread.start()
-            stderr_thread.start()
+            self._output_reader.add(process, emit, on_finished)
             
             if log_callback:
-                log_callback("Output reader threads started")
+                log_callback("Output reader started")
             
-            # Save process information
-            self.running_scripts[script_id] = {
-                'process': process,
-                'output_queue': output_queue,
-                'stdout_thread': stdout_thread,
-                'stderr_thread': stderr_thread,
-                'start_time': time.time()
-            }
+            # Started in the background, so this run does not wait for a second interpreter
+            if self.prestart:
+                threading.Thread(target=self._prestart_process, daemon=True).start()
             
             return script_id
             
@@ -234,6 +479,8 @@ class ScriptRunner:
             if log_callback:
                 log_callback(error_msg)
             logger.error(error_msg)
+            if output_callback and script_id not in self.running_scripts:
+                output_callback(script_id, None, self.get_script_status(script_id))
             return script_id
     
     def get_logs(self, script_id: str, timeout: float = 0.01) -> List[str]:
@@ -242,57 +489,65 @@ class ScriptRunner:
         
         Args:
             script_id: Script ID
-            timeout: Wait timeout (seconds)
+            timeout: How long to wait for the first log line (seconds)
             
         Returns:
             List of logs
         """
-        if script_id not in self.running_scripts:
+        script_info = self.running_scripts.get(script_id)
+        if script_info is None:
             return [f"Script {script_id} does not exist or has ended"]
         
-        script_info = self.running_scripts[script_id]
         output_queue = script_info['output_queue']
         logs = []
         
         try:
-            # 设置最大尝试次数，避免阻塞太久
-            max_attempts = 100
-            attempts = 0
             queue_size = output_queue.qsize()
             logs.append(f"DEBUG: Queue size: {queue_size}")
             
-            while attempts < max_attempts:
-                attempts += 1
-                try:
-                    # 非阻塞方式获取日志
-                    _, log = output_queue.get(block=False)
-                    logs.append(log)
-                    
-                    # 如果队列中还有更多日志，继续获取
-                    if output_queue.qsize() == 0:
-                        # 队列为空，短暂等待看是否有新日志
-                        time.sleep(timeout)
-                except Empty:
-                    # 队列为空，检查进程是否已结束
-                    if not script_info['process'].poll() is None:
-                        # 进程已结束
-                        return_code = script_info['process'].poll()
-                        logs.append(f"DEBUG: Process has ended with return code: {return_code}")
-                        logs.append(f"Script has ended, return code: {return_code}")
-                        
-                        # 检查线程状态
-                        stdout_alive = script_info['stdout_thread'].is_alive()
-                        stderr_alive = script_info['stderr_thread'].is_alive()
-                        logs.append(f"DEBUG: stdout thread alive: {stdout_alive}, stderr thread alive: {stderr_alive}")
-                        
-                        # 清理资源
-                        self._cleanup_script(script_id)
-                    break
+            # 输出读完时进程已结束且所有日志都已入队，先检查再取日志，结束前的日志不会丢失
+            output_finished = script_info['output_finished'].is_set()
+            
+            # 队列已满时丢弃的是最早的日志，在本次取出的日志之前报告
+            dropped_lines = script_info['dropped_lines']
+            if dropped_lines > script_info['reported_dropped_lines']:
+                logs.append(f"WARNING: {dropped_lines - script_info['reported_dropped_lines']} lines of output dropped, "
+                            f"logs were not read in time")
+                script_info['reported_dropped_lines'] = dropped_lines
+            
+            # 阻塞等待第一条日志，然后非阻塞取出队列中的其余日志
+            try:
+                logs.extend(output_queue.get(block=not output_finished, timeout=timeout)[1])
+                while True:
+                    logs.extend(output_queue.get_nowait()[1])
+            except Empty:
+                pass
+            
+            # 清理资源，同时调用 get_logs 时只有移除脚本的调用报告结束
+            if output_finished and self._cleanup_script(script_id):
+                # 进程已结束，returncode 已由输出读取线程获取
+                return_code = script_info['process'].returncode
+                logs.append(f"DEBUG: Process has ended with return code: {return_code}")
+                logs.append(f"Script has ended, return code: {return_code}")
         except Exception as e:
             logs.append(f"Error getting logs: {str(e)}")
         
         return logs
     
+    def _signal_script(self, process, sig: int):
+        """
+        Send a signal to a script and the processes it started
+        
+        Args:
+            process: Child process
+            sig: Signal to send, on Windows the process is always terminated
+        """
+        if sys.platform == 'win32':
+            process.terminate()
+        else:
+            # The script leads its own process group, its group ID is its process ID
+            os.killpg(process.pid, sig)
+    
     def stop_script(self, script_id: str) -> bool:
         """
         Stop script execution
@@ -303,48 +558,46 @@ class ScriptRunner:
         Returns:
             Whether successfully stopped
         """
-        if script_id not in self.running_scripts:
+        script_info = self.running_scripts.get(script_id)
+        if script_info is None:
             return False
         
-        script_info = self.running_scripts[script_id]
         process = script_info['process']
         
         try:
             # Try to terminate process
-            if sys.platform == 'win32':
-                process.terminate()
-            else:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
+            self._signal_script(process, signal.SIGTERM)
             
-            # Wait for process to end
-            process.wait(timeout=5)
+            # Wait for process to end, kill it if it does not end in time
+            try:
+                process.wait(timeout=STOP_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                logger.warning(f"Script {script_id} did not stop within {STOP_TIMEOUT} seconds, killing it")
+                self._signal_script(process, getattr(signal, 'SIGKILL', signal.SIGTERM))
+                process.wait(timeout=STOP_TIMEOUT)
             
-            # Clean up resources
-            self._cleanup_script(script_id)
+            # Clean up resources. Scripts pushing their output are cleaned up by the output reader
+            # once all of it has been read, until then their status is reported as finished
+            if not script_info['pushes_output']:
+                self._cleanup_script(script_id)
             
             return True
         except Exception as e:
             logger.error(f"Error stopping script: {str(e)}")
             return False
     
-    def _cleanup_script(self, script_id: str):
+    def _cleanup_script(self, script_id: str) -> bool:
         """
         Clean up script resources
         
         Args:
             script_id: Script ID
-        """
-        if script_id in self.running_scripts:
-            # Remove from running scripts dictionary
-            del self.running_scripts[script_id]
             
-            # Delete script file
-            script_path = os.path.join(self.scripts_dir, f"{script_id}.py")
-            try:
-                if os.path.exists(script_path):
-                    os.remove(script_path)
-            except Exception as e:
-                logger.error(f"Error deleting script file: {str(e)}")
+        Returns:
+            Whether the script was removed by this call, only one of several concurrent calls removes it
+        """
+        # Remove from running scripts dictionary, pop is atomic so no lock is needed
+        return self.running_scripts.pop(script_id, None) is not None
     
     def get_script_status(self, script_id: str) -> Dict[str, Any]:
         """
@@ -356,33 +609,27 @@ class ScriptRunner:
         Returns:
             Script status dictionary
         """
-        if script_id not in self.running_scripts:
+        script_info = self.running_scripts.get(script_id)
+        if script_info is None:
             return {
                 'script_id': script_id,
                 'status': 'not_found',
                 'message': f"Script {script_id} does not exist or has ended"
             }
         
-        script_info = self.running_scripts[script_id]
         process = script_info['process']
+        start_time = script_info['start_time']
         
-        # Check if process is running
+        # Check if process is running, polling it once
         if process.poll() is None:
             # Process is running
             return {
                 'script_id': script_id,
                 'status': 'running',
                 'pid': process.pid,
-                'start_time': script_info['start_time'],
-                'run_time': time.time() - script_info['start_time']
+                'start_time': start_time,
+                'run_time': time.time() - start_time
             }
         else:
             # Process has ended
-            return {
-                'script_id': script_id,
-                'status': 'finished',
-                'return_code': process.poll(),
-                'start_time': script_info['start_time'],
-                'end_time': time.time(),
-                'run_time': time.time() - script_info['start_time']
-            } 
\ No newline at end of file
+            return self._finished_status(script_id, process, start_time) 
\ No newline at end of file
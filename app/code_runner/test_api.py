@@ -0,0 +1,100 @@
+"""
+Test API
+
+Used to test running scripts and streaming their logs through the API
+"""
+import sys
+import os
+import asyncio
+import json
+
+import httpx
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.code_runner.api import app
+
+
+def client():
+    """Create a client calling the application directly"""
+    # starlette's TestClient does not support the installed httpx, ASGITransport does the same
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def parse_events(body):
+    """Parse the data of the events in an event stream"""
+    events = []
+    for frame in body.decode().split("\n\n"):
+        for line in frame.splitlines():
+            if line.startswith("data: "):
+                events.append(json.loads(line[len("data: "):]))
+    
+    return events
+
+
+async def run_code(c, code):
+    """Start running code, returning its code ID"""
+    response = await c.post("/api/run", json={"code": code, "skip_dependencies": True})
+    assert response.status_code == 200, f"Unexpected response: {response.text}"
+    
+    return response.json()["code_id"]
+
+
+async def stream_logs(c, code_id, timeout=30):
+    """Read the log stream of a script until it ends, returning its events"""
+    response = await asyncio.wait_for(c.get(f"/api/stream-logs/{code_id}"), timeout)
+    assert response.headers["content-type"].startswith("text/event-stream")
+    
+    return parse_events(response.content)
+
+
+async def wait_until_running(c, code_id, timeout=30):
+    """Wait until the script has been started by the runner"""
+    deadline = asyncio.get_running_loop().time() + timeout
+    while (await c.get(f"/api/status/{code_id}")).json()["status"] != "running":
+        assert asyncio.get_running_loop().time() < deadline, "Script did not start in time"
+        await asyncio.sleep(0.05)
+
+
+def test_run_and_stream_logs():
+    """Test the log stream carries the output and ends with the finish event"""
+    async def check():
+        async with client() as c:
+            code_id = await run_code(c, "print('hello')\nprint('world')\n")
+            events = await stream_logs(c, code_id)
+            
+            logs = [line for event in events for line in event["logs"]]
+            assert logs.index("hello") < logs.index("world"), f"Missing output: {logs}"
+            
+            assert events[-1]["finished"] is True
+            assert events[-1]["logs"][-1] == "Script has ended, return code: 0", f"Unexpected end: {events[-1]}"
+            assert not any(event.get("finished") for event in events[:-1]), "Stream finished more than once"
+    
+    asyncio.run(check())
+
+
+def test_stop_ends_stream():
+    """Test stopping a script ends its log stream with the SIGTERM return code"""
+    async def check():
+        async with client() as c:
+            code_id = await run_code(c, "import time\nprint('go')\ntime.sleep(60)\n")
+            await wait_until_running(c, code_id)
+            
+            response = await c.post(f"/api/stop/{code_id}")
+            assert response.status_code == 200, f"Unexpected response: {response.text}"
+            
+            events = await stream_logs(c, code_id)
+            assert events[-1]["finished"] is True
+            assert events[-1]["logs"][-1] == "Script has ended, return code: -15", f"Unexpected end: {events[-1]}"
+            
+            status = (await c.get(f"/api/status/{code_id}")).json()
+            assert status["return_code"] == -15, f"Unexpected status: {status}"
+    
+    asyncio.run(check())
+
+
+if __name__ == "__main__":
+    test_run_and_stream_logs()
+    test_stop_ends_stream()
+    print("All tests passed!")
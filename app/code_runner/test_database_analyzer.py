@@ -6,7 +6,7 @@ Used to test database analyzer functionality
 import json
 import sys
 import os
-from database_analyzer import analyze_database_usage
+from database_analyzer import analyze_database_usage, DatabaseAnalyzerEngine
 
 
 def test_generic_database():
@@ -202,12 +202,102 @@ def test_multiple_databases():
     assert teradata_db["databaseName"] == "RISK_CALC", "Teradata database name should be RISK_CALC"
 
 
+def test_nested_selects_across_blocks():
+    """Test subqueries referencing several databases in several PROC SQL blocks"""
+    code = """
+    libname dwh oracle user=user1 path="DWPROD";
+    libname staging sqlsvr server="sqlserver01";
+    
+    PROC SQL;
+        select a.id, (select max(b.score) from staging.scores b where b.id = a.id)
+        from dwh.customers a;
+    QUIT;
+    
+    proc sql;
+        select * into dwh.customers_backup
+        from dwh.customers;
+        delete from staging.scores where score is null;
+    quit;
+    """
+    
+    result_obj = json.loads(analyze_database_usage(code))
+    
+    # Output results
+    print("\nNested select analysis results:")
+    print(json.dumps(result_obj, indent=2))
+    
+    tables_ops = {
+        (db["databaseName"], table["tableName"]): table["operations"]
+        for db in result_obj for table in db["operationTables"]
+    }
+    assert tables_ops[("staging", "scores")] == ["SELECT", "DELETE"], "scores table should have SELECT and DELETE operations"
+    assert tables_ops[("dwh", "customers")] == ["SELECT"], "customers table should have SELECT operation"
+    assert tables_ops[("dwh", "customers_backup")] == ["SELECT INTO"], "customers_backup table should have SELECT INTO operation"
+
+
+def test_many_selects_without_matching_from():
+    """Test a block of SELECTs not reading from any database, which must not rescan the block per SELECT"""
+    code = (
+        "libname dwh oracle user=user1 path=\"DWPROD\";\n"
+        "proc sql;\n"
+        + "    select count(*) into :n_rows from work.staging;\n" * 5000
+        + "    select * from dwh.customers;\n"
+        "quit;\n"
+    )
+    
+    result_obj = json.loads(analyze_database_usage(code))
+    
+    assert len(result_obj) == 1, "Should find one database"
+    assert result_obj[0]["operationTables"] == [
+        {"tableName": "customers", "operations": ["SELECT"]}
+    ], "customers table should have SELECT operation"
+
+
+def test_analyze_batch():
+    """Test analyzing several SAS files with one engine"""
+    codes = [
+        """
+        libname dwh oracle user=user1 path="DWPROD";
+        proc sql;
+            select * from dwh.customers;
+        quit;
+        """,
+        "data work.test; x = 1; run;",
+        """
+        libname dwh oracle user=user1 path="DWPROD";
+        proc sql;
+            insert into dwh.orders select * from work.orders;
+        quit;
+        """,
+        """
+        libname risk teradata server="tdprod" schema="RISK-DB";
+        proc sql;
+            delete from risk-db.scores_old;
+        quit;
+        """,
+    ]
+    
+    engine = DatabaseAnalyzerEngine()
+    expected = [analyze_database_usage(code) for code in codes]
+    
+    assert engine.analyze_batch(codes) == expected, "Batch results should match single file analysis"
+    assert engine.analyze_batch(codes, max_workers=2) == expected, "Threaded batch results should keep the file order"
+    # Only names that aren't plain words (RISK-DB) need patterns compiled for them
+    assert engine.compiled_patterns.cache_info().hits > 0, "Compiled patterns should be reused across files"
+    assert json.loads(expected[3])[0]["operationTables"] == [
+        {"tableName": "scores_old", "operations": ["DELETE"]}
+    ], "scores_old table should have DELETE operation"
+
+
 if __name__ == "__main__":
     try:
         print("Starting database analyzer tests...")
         test_generic_database()
         test_teradata_database()
         test_multiple_databases()
+        test_nested_selects_across_blocks()
+        test_many_selects_without_matching_from()
+        test_analyze_batch()
         print("\nAll tests passed! Database analyzer is working correctly.")
     except Exception as e:
         print(f"\nTest failed: {str(e)}") 
\ No newline at end of file
@@ -0,0 +1,73 @@
+"""
+Test Dependency Manager
+
+Used to test import extraction of the dependency manager
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.code_runner.dependency_manager import DependencyManager
+
+
+def test_extract_imports():
+    """Test import and from statements, including several modules per statement"""
+    code = """
+import numpy as np, pandas as pd
+import requests.adapters, yaml
+from sklearn.linear_model import LinearRegression
+from . import local_module
+from requests_toolbelt.multipart import (
+    encoder,
+    decoder,
+)
+
+USAGE = '''
+import this_is_not_a_module
+'''
+
+def load():
+    import matplotlib.pyplot as plt
+    from scipy import stats
+"""
+    
+    packages = DependencyManager().extract_imports(code)
+    
+    expected = {"numpy", "pandas", "requests", "yaml", "sklearn", "requests_toolbelt", "matplotlib", "scipy"}
+    assert packages == expected, f"Unexpected packages: {packages}"
+
+
+def test_extract_imports_skips_standard_library():
+    """Test standard library imports are not reported as dependencies"""
+    code = """
+import os, sys
+import json, dataclasses
+from collections import OrderedDict
+importlib_name = "not an import"
+"""
+    
+    packages = DependencyManager().extract_imports(code)
+    
+    assert packages == set(), f"Unexpected packages: {packages}"
+
+
+def test_extract_imports_invalid_code():
+    """Test code with syntax errors still has its import lines found"""
+    code = """
+import numpy as np, pandas as pd
+from sklearn import svm
+print "Python 2 syntax"
+"""
+    
+    packages = DependencyManager().extract_imports(code)
+    
+    assert packages == {"numpy", "pandas", "sklearn"}, f"Unexpected packages: {packages}"
+
+
+if __name__ == "__main__":
+    test_extract_imports()
+    test_extract_imports_skips_standard_library()
+    test_extract_imports_invalid_code()
+    print("All tests passed!")
@@ -0,0 +1,74 @@
+"""
+Test Output Lines
+
+Used to test splitting process output read in chunks into lines
+"""
+import sys
+import os
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.code_runner import output_lines
+from app.code_runner.output_lines import OutputSplitter
+
+
+def split_chunks(chunks):
+    """Split output read in the given chunks, returning all its lines"""
+    splitter = OutputSplitter()
+    lines = []
+    for chunk in chunks:
+        lines.extend(splitter.feed(chunk))
+    lines.extend(splitter.finish())
+    
+    return lines
+
+
+def test_lines_across_chunks():
+    """Test lines and line breaks split across chunks"""
+    chunks = [b"first li", b"ne\nsecond\r", b"\nthird\r", b"fourth\n", b"last"]
+    
+    lines = split_chunks(chunks)
+    
+    assert lines == ["first line", "second", "third", "fourth", "last"], f"Unexpected lines: {lines}"
+
+
+def test_line_ended_by_held_back_carriage_return():
+    """Test a \\r at the end of a chunk ends its line when the next chunk does not start with \\n"""
+    splitter = OutputSplitter()
+    
+    assert splitter.feed(b"10%\r") == []
+    assert splitter.feed(b"20%") == ["10%"]
+    assert splitter.finish() == ["20%"]
+
+
+def test_multibyte_characters_across_chunks():
+    """Test characters split across chunks are decoded whole"""
+    data = "größe\n日本語\n".encode()
+    
+    lines = split_chunks([data[i:i + 1] for i in range(len(data))])
+    
+    assert lines == ["größe", "日本語"], f"Unexpected lines: {lines}"
+
+
+def test_long_line_passed_on_in_pieces():
+    """Test output without line breaks is passed on once it passes the line length limit"""
+    max_line_length = output_lines.MAX_LINE_LENGTH
+    output_lines.MAX_LINE_LENGTH = 10
+    try:
+        splitter = OutputSplitter()
+        pieces = splitter.feed("aaaaaaaaaé".encode())
+        pieces.extend(splitter.feed(b"bbbbbbbbbb\n"))
+    finally:
+        output_lines.MAX_LINE_LENGTH = max_line_length
+    
+    # The character at the limit is not cut in half
+    assert pieces == ["aaaaaaaaa", "ébbbbbbbbbb"], f"Unexpected pieces: {pieces}"
+
+
+if __name__ == "__main__":
+    test_lines_across_chunks()
+    test_line_ended_by_held_back_carriage_return()
+    test_multibyte_characters_across_chunks()
+    test_long_line_passed_on_in_pieces()
+    print("All tests passed!")
@@ -0,0 +1,214 @@
+"""
+Test Script Runner
+
+Used to test running scripts, reading their output and stopping them
+"""
+import sys
+import os
+import time
+import threading
+
+# Add parent directory to sys.path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from app.code_runner import script_runner
+from app.code_runner.script_runner import ScriptRunner
+
+
+def run_with_callback(runner, code, log_callback=None, timeout=30):
+    """Run code pushing its output, returning the output lines and the final status"""
+    lines = []
+    statuses = []
+    finished = threading.Event()
+    
+    def output_callback(script_id, output_lines, status=None):
+        if output_lines is None:
+            statuses.append(status)
+            finished.set()
+        else:
+            lines.extend(output_lines)
+    
+    runner.run_script(code, log_callback=log_callback, skip_dependencies=True, output_callback=output_callback)
+    assert finished.wait(timeout), "Script output did not finish in time"
+    
+    return lines, statuses[0]
+
+
+def read_logs_until_end(runner, script_id, timeout=30):
+    """Poll get_logs until the script has ended, returning all log lines"""
+    logs = []
+    deadline = time.time() + timeout
+    while not any(line.startswith("Script has ended") for line in logs):
+        assert time.time() < deadline, "Script did not end in time"
+        logs.extend(runner.get_logs(script_id, timeout=0.1))
+    
+    return logs
+
+
+def test_run_with_callback():
+    """Test output and the final status are pushed to the callback"""
+    code = """
+import sys
+print("hello")
+print("oops", file=sys.stderr)
+"""
+    
+    lines, status = run_with_callback(ScriptRunner(prestart=False), code)
+    
+    assert "hello" in lines, f"Missing output: {lines}"
+    assert "ERROR: oops" in lines, f"Missing error output: {lines}"
+    assert status["status"] == "finished", f"Unexpected status: {status}"
+    assert status["return_code"] == 0, f"Unexpected return code: {status}"
+
+
+def test_run_with_get_logs():
+    """Test output and the return code are reported by get_logs"""
+    code = """
+import sys
+for i in range(3):
+    print(f"line {i}")
+sys.exit(3)
+"""
+    
+    runner = ScriptRunner(prestart=False)
+    script_id = runner.run_script(code, skip_dependencies=True)
+    logs = read_logs_until_end(runner, script_id)
+    
+    output = [line for line in logs if line.startswith("line ")]
+    assert output == ["line 0", "line 1", "line 2"], f"Unexpected output: {logs}"
+    assert logs[-1] == "Script has ended, return code: 3", f"Unexpected end: {logs}"
+    assert runner.get_script_status(script_id)["status"] == "not_found"
+
+
+def test_stop_escalates_to_kill():
+    """Test a script ignoring SIGTERM is killed once the stop timeout has passed"""
+    code = """
+import signal, time
+signal.signal(signal.SIGTERM, signal.SIG_IGN)
+print("ready")
+time.sleep(60)
+"""
+    
+    runner = ScriptRunner(prestart=False)
+    ready = threading.Event()
+    finished = threading.Event()
+    statuses = []
+    
+    def output_callback(script_id, lines, status=None):
+        if lines is None:
+            statuses.append(status)
+            finished.set()
+        elif "ready" in lines:
+            ready.set()
+    
+    stop_timeout = script_runner.STOP_TIMEOUT
+    script_runner.STOP_TIMEOUT = 0.5
+    try:
+        script_id = runner.run_script(code, skip_dependencies=True, output_callback=output_callback)
+        assert ready.wait(30), "Script did not start in time"
+        
+        start = time.time()
+        assert runner.stop_script(script_id), "Script was not stopped"
+        assert time.time() - start < 5, "Stopping did not escalate after the stop timeout"
+    finally:
+        script_runner.STOP_TIMEOUT = stop_timeout
+    
+    assert finished.wait(30), "Script output did not finish in time"
+    assert statuses[0]["return_code"] == -9, f"Unexpected status: {statuses[0]}"
+
+
+def test_output_queue_overflow():
+    """Test the oldest output is dropped and reported when logs are not read in time"""
+    code = """
+for i in range(20000):
+    print(f"line {i}")
+"""
+    
+    output_queue_size = script_runner.OUTPUT_QUEUE_SIZE
+    script_runner.OUTPUT_QUEUE_SIZE = 10
+    try:
+        runner = ScriptRunner(prestart=False)
+        script_id = runner.run_script(code, skip_dependencies=True)
+        assert runner.running_scripts[script_id]["output_finished"].wait(30), "Script output did not finish in time"
+        logs = read_logs_until_end(runner, script_id)
+    finally:
+        script_runner.OUTPUT_QUEUE_SIZE = output_queue_size
+    
+    warnings = [line for line in logs if line.endswith("lines of output dropped, logs were not read in time")]
+    assert len(warnings) == 1, f"Dropped output not reported: {logs[:5]}"
+    
+    # Only the oldest lines are dropped, the end of the output is kept
+    output = [line for line in logs if line.startswith("line ")]
+    assert output == [f"line {i}" for i in range(20000 - len(output), 20000)], f"End of output missing: {output[-3:]}"
+    # Debug lines are dropped and counted along with the output
+    assert int(warnings[0].split()[1]) >= 20000 - len(output), "Dropped lines miscounted"
+
+
+def wait_for_spare(runner, timeout=30):
+    """Wait until the runner has prestarted an interpreter, returning it"""
+    deadline = time.time() + timeout
+    while runner._spare is None:
+        assert time.time() < deadline, "No interpreter was prestarted"
+        time.sleep(0.01)
+    
+    return runner._spare[0]
+
+
+def test_prestarted_interpreter():
+    """Test the prestarted interpreter runs the next script unless packages were installed since"""
+    runner = ScriptRunner()
+    run_with_callback(runner, "print('first')\n")
+    
+    # Reused by the next script
+    spare = wait_for_spare(runner)
+    log_lines = []
+    lines, status = run_with_callback(runner, "import os\nprint(os.getpid())\n", log_callback=log_lines.append)
+    assert any(line.startswith("Using prestarted process") for line in log_lines), f"Not reused: {log_lines}"
+    assert str(spare.pid) in lines, f"Not run in the prestarted interpreter: {lines}"
+    
+    # Discarded once packages have been installed
+    spare = wait_for_spare(runner)
+    runner.dependency_manager.install_count += 1
+    log_lines = []
+    lines, status = run_with_callback(runner, "import os\nprint(os.getpid())\n", log_callback=log_lines.append)
+    assert any(line.startswith("Started process") for line in log_lines), f"Outdated interpreter used: {log_lines}"
+    assert str(spare.pid) not in lines, f"Run in the outdated interpreter: {lines}"
+    assert spare.returncode is not None, "Outdated interpreter is still running"
+
+
+def test_stop_leaves_other_scripts_running():
+    """Test stopping a script signals only its own process group"""
+    code = """
+import time
+print("ready")
+time.sleep(60)
+"""
+    
+    runner = ScriptRunner(prestart=False)
+    script_ids = []
+    for _ in range(2):
+        script_id = runner.run_script(code, skip_dependencies=True)
+        logs = []
+        deadline = time.time() + 30
+        while "ready" not in logs:
+            assert time.time() < deadline, "Script did not start in time"
+            logs.extend(runner.get_logs(script_id, timeout=0.1))
+        script_ids.append(script_id)
+    
+    assert runner.stop_script(script_ids[0]), "Script was not stopped"
+    
+    # This process was not signalled, and the other script keeps running
+    status = runner.get_script_status(script_ids[1])
+    assert status["status"] == "running", f"Other script stopped: {status}"
+    
+    assert runner.stop_script(script_ids[1]), "Script was not stopped"
+
+
+if __name__ == "__main__":
+    test_run_with_callback()
+    test_run_with_get_logs()
+    test_stop_escalates_to_kill()
+    test_stop_leaves_other_scripts_running()
+    test_output_queue_overflow()
+    test_prestarted_interpreter()
+    print("All tests passed!")
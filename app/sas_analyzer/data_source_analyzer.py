@@ -7,6 +7,15 @@ from typing import Dict, List, Any, Optional
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.chat_models import AzureChatOpenAI
 
+# Various patterns to detect dataset references, compiled once at module load
+_DATASET_PATTERNS = [
+    re.compile(r'set\s+([\w\.]+)', re.IGNORECASE),  # SET statement
+    re.compile(r'data\s+([\w\.]+)', re.IGNORECASE),  # DATA statement
+    re.compile(r'from\s+([\w\.]+)', re.IGNORECASE),  # FROM clause in SQL
+    re.compile(r'table\s*=\s*([\w\.]+)', re.IGNORECASE),  # TABLE= option
+    re.compile(r'out\s*=\s*([\w\.]+)', re.IGNORECASE)  # OUT= option
+]
+
 
 class SASDataSourceAnalyzer:
     """SAS Code Data Source Analyzer"""
@@ -83,19 +92,10 @@ class SASDataSourceAnalyzer:
         Returns:
             List of dataset names
         """
-        # Various patterns to detect dataset references
-        patterns = [
-            r'set\s+([\w\.]+)',  # SET statement
-            r'data\s+([\w\.]+)',  # DATA statement
-            r'from\s+([\w\.]+)',  # FROM clause in SQL
-            r'table\s*=\s*([\w\.]+)',  # TABLE= option
-            r'out\s*=\s*([\w\.]+)'  # OUT= option
-        ]
-        
         datasets = set()
         
-        for pattern in patterns:
-            matches = re.findall(pattern, code, re.IGNORECASE)
+        for pattern in _DATASET_PATTERNS:
+            matches = pattern.findall(code)
             for match in matches:
                 # Normalize dataset name and add to set
                 dataset_name = match.strip()
@@ -119,8 +119,8 @@ class SASDataSourceAnalyzer:
         
         # Very simple variable extraction, not comprehensive
         for dataset in datasets:
-            # Try to find variables defined or used with this dataset
-            dataset_pattern = fr'{dataset}\.([\w]+)'
+            # Try to find variables defined or used with this dataset, whose name is matched literally
+            dataset_pattern = fr'{re.escape(dataset)}\.([\w]+)'
             var_matches = re.findall(dataset_pattern, code, re.IGNORECASE)
             
             if var_matches:
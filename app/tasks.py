@@ -6,6 +6,8 @@ import json
 import logging
 from typing import Dict, Any, Optional
 
+from celery import group
+
 from app.celery_app import celery_app
 from app.sas_analyzer.code_chunker import SASCodeChunker
 from app.sas_analyzer.complexity_analyzer import SASComplexityAnalyzer
@@ -140,14 +142,14 @@ def analyze_directory(directory_path: str, file_pattern: str = "*.sas", max_toke
         
         results = {}
         
-        # 分析每个文件
-        for file_path in files:
-            file_name = os.path.basename(file_path)
-            logger.info(f"分析文件: {file_name}")
+        # 一次性提交所有文件分析任务
+        if files:
+            group_result = group(analyze_file.s(file_path, max_token_size) for file_path in files).apply_async()
             
-            # 调用文件分析任务
-            file_result = analyze_file.delay(file_path, max_token_size)
-            results[file_name] = file_result.id
+            for file_path, file_result in zip(files, group_result.results):
+                file_name = os.path.basename(file_path)
+                logger.info(f"分析文件: {file_name}")
+                results[file_name] = file_result.id
         
         return {
             "directory": directory_path,